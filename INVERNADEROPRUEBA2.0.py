@@ -1,15 +1,51 @@
 import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
+from tkinter import ttk, simpledialog, messagebox, font as tkfont
 import paho.mqtt.client as mqtt
 import json
-import time
 import datetime
-import threading
 import random
+import re
 import requests
-from PIL import Image, ImageTk
+import numpy as np
+try:
+    from numba import njit # Opcional: acelera el núcleo de la simulación de crecimiento
+except ImportError:
+    njit = None
+try:
+    import orjson # Opcional: (de)codificación JSON en C para las cargas MQTT
+except ImportError:
+    orjson = None
+from PIL import Image, ImageDraw, ImageTk
 import hashlib
+import heapq
+import hmac
 import os
+import socket
+import uuid
+import threading
+import atexit
+import collections
+import contextlib
+import functools
+import logging
+
+if orjson is not None:
+    def cargar_json(datos):
+        return orjson.loads(datos)
+
+    def volcar_json(obj):
+        return orjson.dumps(obj).decode()
+else:
+    cargar_json = json.loads
+
+    def volcar_json(obj):
+        # Misma salida compacta que orjson: sin espacios y UTF-8 en lugar de escapes \uXXXX
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+# --- Registro (logging) ---
+# Sin handler propio: el nivel y la salida se configuran en __main__ (variable INVERNADERO_LOG)
+log = logging.getLogger("invernadero.gui")
+log.addHandler(logging.NullHandler())
 
 # --- Configuración MQTT ---
 BROKER_MQTT_HOST = "broker.hivemq.com"
@@ -37,6 +73,18 @@ TEMAS_MQTT = [
     # --- FIN CAMBIO ---
 ]
 
+# Cargas de comando ya codificadas: se publican tal cual, sin volver a codificar el str
+_PAYLOAD_ON = b"ON"
+_PAYLOAD_OFF = b"OFF"
+_PAYLOADS_COMANDO = {"ON": _PAYLOAD_ON, "OFF": _PAYLOAD_OFF}
+
+# Argumento de subscribe() precalculado una sola vez; se reutiliza en cada reconexión.
+# paho exige una lista (no una tupla) para suscribirse a varios temas en un paquete.
+_SUBSCRIBE_ARG = [(tema, 0) for tema in TEMAS_MQTT]
+
+# Capacidad del anillo de mensajes MQTT (potencia de dos); si se llena se descartan los más antiguos
+TAMANO_ANILLO_MQTT = 1024
+
 # Diccionario para almacenar las últimas lecturas recibidas (o valores de deslizadores)
 lecturas_actuales = {
     "temperatura": 25.0,
@@ -50,6 +98,9 @@ CONFIG_FILE = "config.json"
 USERS_FILE = "users.json"
 SCHEDULE_FILE = "irrigation_schedule.json"
 
+# Iteraciones de PBKDF2-HMAC-SHA256 para las contraseñas de usuario
+PBKDF2_ITERACIONES = 200_000
+
 # Rangos de sensores (se cargarán desde CONFIG_FILE)
 sensor_ranges = {
     "temperatura": {"ideal_min": 20, "ideal_max": 28, "letal_min": 10, "letal_max": 35},
@@ -58,9 +109,38 @@ sensor_ranges = {
     "luz": {"ideal_min": 200, "ideal_max": 500, "letal_min": 50, "letal_max": 800}
 }
 
+# Orden fijo de los sensores en los arreglos de NumPy usados por la simulación
+SENSORES_ORDEN = ("temperatura", "humedad_aire", "humedad_suelo", "luz")
+
+# Valores con los que la GUI rellena las lecturas que aún no han llegado
+LECTURAS_POR_DEFECTO = (("temperatura", 25.0), ("humedad_aire", 60.0), ("humedad_suelo", 500), ("luz", 500))
+
+# Rangos de sensores como arreglo (4, 4): columnas ideal_min, ideal_max, letal_min, letal_max.
+# Se reconstruye con actualizar_rangos_arr() cada vez que cambia sensor_ranges.
+rangos_sensores_arr = None
+
+# Mensaje de la GUI cuando una lectura sale de su rango letal
+MENSAJES_ALERTA = {
+    "temperatura": "Temperatura fuera de rango!",
+    "humedad_aire": "Humedad del aire incorrecta!",
+    "humedad_suelo": "Humedad del suelo crítica!",
+    "luz": "Nivel de luz inadecuado!",
+}
+# Tabla [(clave, letal_min, letal_max, mensaje), ...] en el orden de SENSORES_ORDEN;
+# también se reconstruye en actualizar_rangos_arr()
+tabla_alertas = []
+
 # Horarios de riego (se cargarán desde SCHEDULE_FILE)
 irrigation_schedule = []
 
+# Montículo de (marca de tiempo del próximo disparo, índice en irrigation_schedule);
+# se reconstruye al cargar o guardar los horarios
+heap_horarios_riego = []
+
+# Días tal como aparecen en los horarios, en el orden de datetime.weekday()
+DIAS_SEMANA = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+INDICE_DIA_SEMANA = {dia: i for i, dia in enumerate(DIAS_SEMANA)}
+
 # --- Funciones de utilidad para cargar/guardar configuración ---
 def load_config():
     global sensor_ranges
@@ -74,13 +154,39 @@ def load_config():
                         if sensor_key in config["sensor_ranges"]:
                             sensor_ranges[sensor_key].update(config["sensor_ranges"][sensor_key])
             except json.JSONDecodeError:
-                print(f"Error decoding {CONFIG_FILE}. Using default ranges.")
-    print(f"Loaded sensor ranges: {sensor_ranges}")
+                log.warning("Error decoding %s. Using default ranges.", CONFIG_FILE)
+    actualizar_rangos_arr()
+    log.info("Loaded sensor ranges: %s", sensor_ranges)
+
+def actualizar_rangos_arr():
+    """Reconstruye rangos_sensores_arr a partir de sensor_ranges."""
+    global rangos_sensores_arr
+    rangos_sensores_arr = np.array(
+        [[sensor_ranges[clave][limite] for limite in ("ideal_min", "ideal_max", "letal_min", "letal_max")]
+         for clave in SENSORES_ORDEN],
+        dtype=float)
+    tabla_alertas[:] = [(clave, sensor_ranges[clave]["letal_min"], sensor_ranges[clave]["letal_max"], MENSAJES_ALERTA[clave])
+                        for clave in SENSORES_ORDEN]
+
+def _write_json_atomic(path, data):
+    """Escribe JSON en un archivo temporal y lo renombra: nunca queda un archivo a medio escribir."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+# Archivos con cambios pendientes de escribir; save_* los marca y flush_* los escribe
+_GUARDADO_PENDIENTE = {"config": False, "schedule": False}
 
 def save_config():
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump({"sensor_ranges": sensor_ranges}, f, indent=4)
-    print(f"Saved sensor ranges: {sensor_ranges}")
+    """Marca la configuración como modificada; la escritura real la hace flush_config()."""
+    _GUARDADO_PENDIENTE["config"] = True
+
+def flush_config():
+    if _GUARDADO_PENDIENTE["config"]:
+        _write_json_atomic(CONFIG_FILE, {"sensor_ranges": sensor_ranges})
+        _GUARDADO_PENDIENTE["config"] = False
+        log.info("Saved sensor ranges: %s", sensor_ranges)
 
 def load_schedule():
     global irrigation_schedule
@@ -89,16 +195,90 @@ def load_schedule():
             try:
                 irrigation_schedule = json.load(f)
             except json.JSONDecodeError:
-                print(f"Error decoding {SCHEDULE_FILE}. Starting with empty schedule.")
-    print(f"Loaded irrigation schedule: {irrigation_schedule}")
+                log.warning("Error decoding %s. Starting with empty schedule.", SCHEDULE_FILE)
+    actualizar_indice_horarios()
+    log.info("Loaded irrigation schedule: %s", irrigation_schedule)
+
+# Hora de un horario de riego: "H:MM" o "HH:MM", 00:00-23:59. re.ASCII: \d solo acepta 0-9
+# (sin él "²" o los dígitos de otras escrituras pasarían la validación y fallarían en int())
+_HORA_RE = re.compile(r"([01]?\d|2[0-3]):([0-5]\d)", re.ASCII)
+# Duración en minutos: solo dígitos ASCII
+_DURACION_RE = re.compile(r"\d+", re.ASCII)
+
+@functools.lru_cache(maxsize=None)
+def minuto_del_dia(time_str):
+    """Convierte "HH:MM" en minutos desde la medianoche (cada texto se analiza una sola vez)."""
+    hour, minute = map(int, time_str.split(':'))
+    return hour * 60 + minute
+
+def proximo_disparo_riego(schedule, desde):
+    """
+    Devuelve el primer datetime >= desde en que corresponde regar según el horario,
+    o None si el día no es uno de DIAS_SEMANA ni "Todos los días" (ese horario nunca se dispara).
+    """
+    if schedule["day"] != "Todos los días":
+        indice_dia = INDICE_DIA_SEMANA.get(schedule["day"])
+        if indice_dia is None:
+            return None
+    hour, minute = divmod(minuto_del_dia(schedule["time"]), 60)
+    disparo = desde.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if schedule["day"] == "Todos los días":
+        if disparo < desde:
+            disparo += datetime.timedelta(days=1)
+    else:
+        disparo += datetime.timedelta(days=(indice_dia - desde.weekday()) % 7)
+        if disparo < desde:
+            disparo += datetime.timedelta(days=7)
+    return disparo
+
+def actualizar_indice_horarios():
+    """Reconstruye heap_horarios_riego a partir de irrigation_schedule."""
+    ahora = datetime.datetime.now()
+    entradas = []
+    for i, schedule in enumerate(irrigation_schedule):
+        try:
+            disparo = proximo_disparo_riego(schedule, ahora)
+        except (KeyError, ValueError): # Horario sin "time" o con una hora ilegible
+            disparo = None
+        if disparo is None:
+            log.warning("Horario de riego %d ignorado: día u hora no válidos (%r)", i + 1, schedule)
+            continue
+        entradas.append((disparo.timestamp(), i))
+    heap_horarios_riego[:] = entradas
+    heapq.heapify(heap_horarios_riego)
 
 def save_schedule():
-    with open(SCHEDULE_FILE, 'w') as f:
-        json.dump(irrigation_schedule, f, indent=4)
-    print(f"Saved irrigation schedule: {irrigation_schedule}")
+    """Actualiza el índice en memoria y marca los horarios como modificados (ver flush_schedule())."""
+    actualizar_indice_horarios()
+    _GUARDADO_PENDIENTE["schedule"] = True
+
+def flush_schedule():
+    if _GUARDADO_PENDIENTE["schedule"]:
+        _write_json_atomic(SCHEDULE_FILE, irrigation_schedule)
+        _GUARDADO_PENDIENTE["schedule"] = False
+        log.info("Saved irrigation schedule: %s", irrigation_schedule)
+
+def hash_password(password, salt):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PBKDF2_ITERACIONES).hex()
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def hash_password_legacy(password):
+    """Hash SHA-256 sin sal del formato antiguo de users.json (solo para migración)."""
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+def crear_registro_usuario(password):
+    """Devuelve la entrada de users.json para una contraseña nueva: {"salt": hex, "hash": hex}."""
+    salt = os.urandom(16)
+    return {"salt": salt.hex(), "hash": hash_password(password, salt)}
+
+def verificar_password(registro, password):
+    """
+    Comprueba una contraseña contra una entrada de users.json en tiempo constante.
+    Acepta tanto el formato nuevo (dict con sal) como el antiguo (cadena SHA-256).
+    """
+    if isinstance(registro, str):
+        return hmac.compare_digest(registro, hash_password_legacy(password))
+    candidato = hash_password(password, bytes.fromhex(registro["salt"]))
+    return hmac.compare_digest(registro["hash"], candidato)
 
 def load_users():
     if os.path.exists(USERS_FILE):
@@ -110,30 +290,197 @@ def load_users():
     return {}
 
 def save_users(users):
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    _write_json_atomic(USERS_FILE, users)
+
+# Caché de usuarios en memoria: users.json se lee una sola vez y se escribe de forma diferida
+_USERS_CACHE = {"data": None, "dirty": False}
+
+def get_users():
+    """Devuelve el diccionario de usuarios residente en memoria (lo carga la primera vez)."""
+    if _USERS_CACHE["data"] is None:
+        _USERS_CACHE["data"] = load_users()
+    return _USERS_CACHE["data"]
+
+def mark_users_dirty():
+    _USERS_CACHE["dirty"] = True
+
+def flush_users():
+    """Escribe users.json solo si hay cambios pendientes en la caché."""
+    if _USERS_CACHE["dirty"] and _USERS_CACHE["data"] is not None:
+        save_users(_USERS_CACHE["data"])
+        _USERS_CACHE["dirty"] = False
+
+# Último recurso para no perder cambios si la aplicación se cierra antes del guardado diferido
+atexit.register(flush_users)
+atexit.register(flush_config)
+atexit.register(flush_schedule)
 
 # Cargar configuración al inicio
 load_config()
 load_schedule()
 
+class AnilloMensajesMQTT:
+    """
+    Buffer circular acotado entre el hilo de red de paho (productor) y el hilo de Tk (consumidor).
+    push() y drain() son operaciones atómicas de deque, sin locks explícitos.
+    Al desbordarse se descarta el mensaje más antiguo.
+    """
+    def __init__(self, capacidad=TAMANO_ANILLO_MQTT):
+        self._buffer = collections.deque(maxlen=capacidad)
+
+    def push(self, elemento):
+        self._buffer.append(elemento)
+
+    def drain(self):
+        """Extrae y devuelve todos los elementos pendientes, en orden de llegada."""
+        elementos = []
+        popleft = self._buffer.popleft
+        try:
+            while True:
+                elementos.append(popleft())
+        except IndexError:
+            pass
+        return elementos
+
+class HistorialCircular:
+    """
+    Buffer circular numérico de tamaño fijo sobre un ndarray (historiales de los gráficos).
+    Cada valor se escribe dos veces (posición i e i + capacidad), así valores() devuelve
+    siempre una vista contigua y ordenada, sin copiar ni rotar el array.
+    """
+    def __init__(self, capacidad, dtype=np.float64):
+        self.maxlen = capacidad
+        self._buffer = np.zeros(2 * capacidad, dtype=dtype)
+        self._inicio = 0
+        self._n = 0
+
+    def append(self, valor):
+        if self._n < self.maxlen:
+            pos = self._n
+            self._n += 1
+        else:
+            pos = self._inicio
+            self._inicio = (self._inicio + 1) % self.maxlen
+        self._buffer[pos] = self._buffer[pos + self.maxlen] = valor
+
+    def valores(self):
+        """Vista (de solo lectura por convención) de los valores, del más antiguo al más reciente."""
+        return self._buffer[self._inicio:self._inicio + self._n]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, indice):
+        return float(self.valores()[indice])
+
+# Límite de PhotoImages redimensionados en caché (arrastrar la ventana genera muchos tamaños distintos)
+MAX_IMAGENES_REDIMENSIONADAS = 32
+# Espera máxima entre comprobaciones de horarios de riego (por si se ajusta el reloj del sistema)
+MAX_ESPERA_RIEGO_S = 600.0
+# Un disparo que llega con más retraso que esto (suspensión, salto del reloj) se omite, no se recupera
+TOLERANCIA_RIEGO_S = 60.0
+# Con más barras que esto las etiquetas numéricas del gráfico de agua se solapan y no se dibujan
+MAX_ETIQUETAS_BARRAS = 15
+# Medidas fijas (px) del dibujo de la planta
+RADIO_FLOR = 10
+RADIO_FRUTO = 8
+RADIO_DOSEL_MUERTO_MIN, RADIO_DOSEL_MUERTO_MAX = 5, 30
+
+# Caché de iconos ya decodificados y reducidos, por (ruta, tamaño)
+_IMG_CACHE = {}
+
+def _load_icon(path, size):
+    """
+    Abre una imagen, la convierte a RGBA y la reduce (manteniendo proporción) a como máximo `size`.
+    El PhotoImage resultante se guarda en _IMG_CACHE y se reutiliza en llamadas posteriores.
+    Requiere que ya exista la ventana raíz de Tk.
+    """
+    clave = (path, size)
+    icono = _IMG_CACHE.get(clave)
+    if icono is None:
+        imagen = Image.open(path).convert('RGBA')
+        imagen.thumbnail(size, Image.LANCZOS)
+        icono = ImageTk.PhotoImage(imagen)
+        _IMG_CACHE[clave] = icono
+    return icono
+
+def _configure_styles(root):
+    """Configuración de estilos ttk para un look más "oscuro" y "redondeado". Se llama una sola vez."""
+    estilo = ttk.Style(root)
+    estilo.theme_use('clam')
+    estilo.configure("TLabel", background="#333333", foreground="white", font=("Arial", 10))
+    estilo.configure("TFrame", background="#333333", borderwidth=0, relief="flat")
+    estilo.configure("TLabelframe", background="#333333", foreground="white", relief="solid", borderwidth=2, bordercolor="#424242")
+    estilo.configure("TLabelframe.Label", background="#333333", foreground="white", font=("Arial", 11, "bold"))
+    estilo.configure("TScale", background="#333333", troughcolor="#424242", slidercolor="#616161")
+    estilo.configure("TButton", background="#424242", foreground="white", font=("Arial", 10, "bold"), relief="raised")
+    estilo.map("TButton", background=[('active', '#525252')])
+
 # --- Simulación de Crecimiento de Planta ---
 
+# Etapas de crecimiento; el estado guarda el índice en esta tupla
+ETAPAS_CRECIMIENTO = ("Semilla", "Brote", "Joven", "Madura", "Floración", "Fructificación", "Muerta")
+ETAPA_MUERTA = ETAPAS_CRECIMIENTO.index("Muerta")
+# Edad (días) a partir de la cual empieza cada etapa desde "Brote" (ajustado para 4 meses)
+UMBRALES_ETAPA_DIAS = np.array([5, 15, 40, 70, 100], dtype=float)
+
+class PlantaSoA:
+    """
+    Estado de N plantas como estructura de arreglos: un np.ndarray por atributo, indexado por planta.
+    Permite simular muchas plantas a la vez con aritmética vectorizada (ver simular_crecimiento_batch).
+    """
+    def __init__(self, n=1, etapa_crecimiento="Semilla", edad_dias=0, altura_cm=0.5):
+        self.n = n
+        self.etapa_idx = np.full(n, ETAPAS_CRECIMIENTO.index(etapa_crecimiento), dtype=np.int8)
+        self.edad_dias = np.full(n, float(edad_dias))
+        self.altura_cm = np.full(n, float(altura_cm))
+        self.salud = np.full(n, 100.0) # Porcentaje, 0-100
+        self.esta_muerta = np.zeros(n, dtype=bool) # Indicador de si la planta está muerta
+        self.altura_maxima_cm = np.full(n, 50.0) # Altura máxima que puede alcanzar la planta (ej. 50 cm)
+
+class _CampoPlanta:
+    """Descriptor que expone la posición `indice` de un arreglo de PlantaSoA como atributo escalar."""
+    def __init__(self, nombre_arreglo, conversion):
+        self.nombre_arreglo = nombre_arreglo
+        self.conversion = conversion
+
+    def __get__(self, planta, tipo=None):
+        if planta is None:
+            return self
+        return self.conversion(getattr(planta.estado, self.nombre_arreglo)[planta.indice])
+
+    def __set__(self, planta, valor):
+        getattr(planta.estado, self.nombre_arreglo)[planta.indice] = valor
+
 class Planta:
     """
     Representa una planta con atributos que cambian con el tiempo según factores ambientales.
+    Es una vista sobre la posición `indice` de un PlantaSoA (por defecto, uno propio de una sola planta).
     """
-    def __init__(self, nombre="Corona de Cristo", etapa_crecimiento="Semilla", edad_dias=0, altura_cm=0.5):
+    edad_dias = _CampoPlanta("edad_dias", float)
+    altura_cm = _CampoPlanta("altura_cm", float)
+    salud = _CampoPlanta("salud", float)
+    esta_muerta = _CampoPlanta("esta_muerta", bool)
+    altura_maxima_cm = _CampoPlanta("altura_maxima_cm", float)
+
+    def __init__(self, nombre="Corona de Cristo", etapa_crecimiento="Semilla", edad_dias=0, altura_cm=0.5, estado=None, indice=0):
         self.nombre = nombre
-        self.etapa_crecimiento = etapa_crecimiento # Semilla, Brote, Joven, Madura, Floración, Fructificación, Muerta
-        self.edad_dias = edad_dias
-        self.altura_cm = altura_cm
-        self.salud = 100 # Porcentaje, 0-100
-        self.esta_muerta = False # Indicador de si la planta está muerta
+        if estado is None:
+            estado = PlantaSoA(1, etapa_crecimiento, edad_dias, altura_cm)
+        self.estado = estado
+        self.indice = indice
         self.color_planta = "#4CAF50" # Color verde saludable inicial
-        self.altura_maxima_cm = 50.0 # Altura máxima que puede alcanzar la planta (ej. 50 cm)
         self.tipo_planta = "Sombra" # Tipo de planta, por defecto Sombra
 
+    @property
+    def etapa_crecimiento(self):
+        # Semilla, Brote, Joven, Madura, Floración, Fructificación, Muerta
+        return ETAPAS_CRECIMIENTO[self.estado.etapa_idx[self.indice]]
+
+    @etapa_crecimiento.setter
+    def etapa_crecimiento(self, etapa):
+        self.estado.etapa_idx[self.indice] = ETAPAS_CRECIMIENTO.index(etapa)
+
     def __str__(self):
         return (f"--- Estado de {self.nombre} ---\n"
                 f"  Etapa de Crecimiento: {self.etapa_crecimiento}\n"
@@ -180,71 +527,148 @@ def obtener_puntuacion_factor(valor, ideal_min, ideal_max, letal_min, letal_max)
     else:
         return 0.0 # Letal
 
-def simular_crecimiento(planta, dias_transcurridos, lecturas_ambiente):
+def calcular_puntuaciones_factores(valores):
     """
-    Simula el crecimiento y la salud de una planta basándose en el tiempo transcurrido y las lecturas ambientales.
+    Versión vectorizada de obtener_puntuacion_factor para los cuatro sensores a la vez.
+    valores: arreglo (4,) en el orden de SENSORES_ORDEN; NaN indica que no hay datos.
+    Devuelve un arreglo (4,) de puntuaciones entre 0 y 1.
+    """
+    ideal_min, ideal_max, letal_min, letal_max = rangos_sensores_arr.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Rampa de subida (letal_min -> ideal_min) y de bajada (ideal_max -> letal_max)
+        subida = np.where(ideal_min > letal_min, (valores - letal_min) / (ideal_min - letal_min), np.where(valores >= ideal_min, 1.0, 0.0))
+        bajada = np.where(letal_max > ideal_max, (letal_max - valores) / (letal_max - ideal_max), np.where(valores <= ideal_max, 1.0, 0.0))
+    puntuaciones = np.clip(subida, 0.0, 1.0) * np.clip(bajada, 0.0, 1.0)
+    return np.where(np.isnan(valores), 0.5, puntuaciones) # Neutral si no hay datos
+
+# Constantes de la simulación, compartidas por el núcleo Numba y la ruta NumPy
+SENSIBILIDAD_SALUD = 50.0 # Qué tan rápido cambia la salud
+# Crecimiento base en condiciones ideales y salud perfecta (49.5 cm en 120 días)
+TASA_CRECIMIENTO_BASE_CM_POR_DIA = 0.4125
+
+def _simular_crecimiento_kernel(salud, altura, edad, muerta, etapa, altura_max, puntuacion, dias, umbrales):
+    """
+    Un paso de simulación por planta, modificando los arreglos en el lugar.
+    Misma lógica que la ruta NumPy de simular_crecimiento_batch; pensado para compilarse con Numba.
+    """
+    for i in range(salud.shape[0]):
+        if muerta[i]:
+            # La planta se marchita gradualmente si está muerta
+            altura[i] = max(0.2, altura[i] - 0.05 * dias)
+            continue
+
+        edad[i] += dias
+        nueva_salud = min(100.0, max(0.0, salud[i] + (puntuacion[i] - 0.5) * SENSIBILIDAD_SALUD * dias))
+        if nueva_salud <= 0.1:
+            muerta[i] = True
+            salud[i] = 0.0
+            etapa[i] = ETAPA_MUERTA
+            altura[i] = max(0.2, altura[i] * 0.9)
+            continue
+        salud[i] = nueva_salud
+
+        tasa_crecimiento_actual = TASA_CRECIMIENTO_BASE_CM_POR_DIA * puntuacion[i] * (nueva_salud / 100.0)
+        altura[i] = max(0.5, min(altura[i] + tasa_crecimiento_actual * dias, altura_max[i]))
+
+        if edad[i] >= umbrales[0]:
+            e = 0
+            while e < umbrales.shape[0] and edad[i] >= umbrales[e]:
+                e += 1
+            etapa[i] = e
+
+# Con Numba disponible el núcleo se compila la primera vez (y se guarda en caché en disco)
+_simular_numba = njit(cache=True, fastmath=True)(_simular_crecimiento_kernel) if njit is not None else None
+
+def valores_ambiente(lecturas_ambiente):
+    """Convierte un diccionario de lecturas en un arreglo (4,) en el orden de SENSORES_ORDEN (NaN = sin datos)."""
+    return np.array([np.nan if lecturas_ambiente.get(clave) is None else lecturas_ambiente[clave] for clave in SENSORES_ORDEN], dtype=float)
+
+def simular_crecimiento_batch(plantas, dias_transcurridos, valores):
+    """
+    Simula el crecimiento y la salud de todas las plantas de un PlantaSoA a la vez.
+    valores: lecturas en el orden de SENSORES_ORDEN, (4,) compartidas por todas las plantas o (N, 4).
     Incluye condiciones de muerte y recuperación.
     """
-    if planta.esta_muerta:
-        # La planta se marchita gradualmente si está muerta
-        planta.altura_cm = max(0.2, planta.altura_cm - (0.05 * dias_transcurridos))
-        return # No hay crecimiento ni cambios de salud si está muerta
+    # Calcular puntuación ambiental promedio con los rangos cargados globalmente
+    puntuacion_ambiente_promedio = np.broadcast_to(calcular_puntuaciones_factores(valores).mean(axis=-1), (plantas.n,))
 
-    planta.edad_dias += dias_transcurridos
+    if _simular_numba is not None:
+        _simular_numba(plantas.salud, plantas.altura_cm, plantas.edad_dias, plantas.esta_muerta, plantas.etapa_idx,
+                       plantas.altura_maxima_cm, np.ascontiguousarray(puntuacion_ambiente_promedio),
+                       float(dias_transcurridos), UMBRALES_ETAPA_DIAS)
+        return
 
-    # Usar los rangos cargados globalmente
-    temp_ranges = sensor_ranges["temperatura"]
-    hum_air_ranges = sensor_ranges["humedad_aire"]
-    hum_soil_ranges = sensor_ranges["humedad_suelo"]
-    luz_ranges = sensor_ranges["luz"]
+    vivas = ~plantas.esta_muerta
 
-    # Calcular puntuaciones individuales de factores
-    puntuacion_temp = obtener_puntuacion_factor(lecturas_ambiente.get("temperatura"), temp_ranges["ideal_min"], temp_ranges["ideal_max"], temp_ranges["letal_min"], temp_ranges["letal_max"])
-    puntuacion_humedad_aire = obtener_puntuacion_factor(lecturas_ambiente.get("humedad_aire"), hum_air_ranges["ideal_min"], hum_air_ranges["ideal_max"], hum_air_ranges["letal_min"], hum_air_ranges["letal_max"])
-    puntuacion_humedad_suelo = obtener_puntuacion_factor(lecturas_ambiente.get("humedad_suelo"), hum_soil_ranges["ideal_min"], hum_soil_ranges["ideal_max"], hum_soil_ranges["letal_min"], hum_soil_ranges["letal_max"])
-    puntuacion_luz = obtener_puntuacion_factor(lecturas_ambiente.get("luz"), luz_ranges["ideal_min"], luz_ranges["ideal_max"], luz_ranges["letal_min"], luz_ranges["letal_max"])
+    # Las plantas muertas se marchitan gradualmente; no hay crecimiento ni cambios de salud
+    plantas.altura_cm = np.where(vivas, plantas.altura_cm, np.maximum(0.2, plantas.altura_cm - (0.05 * dias_transcurridos)))
+    if not vivas.any():
+        return
 
-    # Calcular puntuación ambiental promedio
-    puntuaciones_ambientales = [puntuacion_temp, puntuacion_humedad_aire, puntuacion_humedad_suelo, puntuacion_luz]
-    puntuacion_ambiente_promedio = sum(puntuaciones_ambientales) / len(puntuaciones_ambientales)
+    plantas.edad_dias = np.where(vivas, plantas.edad_dias + dias_transcurridos, plantas.edad_dias)
 
     # --- Impacto en la Salud ---
-    sensibilidad_salud = 50.0 # Qué tan rápido cambia la salud
-    cambio_salud_por_dia = (puntuacion_ambiente_promedio - 0.5) * sensibilidad_salud # Rango de -25 a +25
+    cambio_salud_por_dia = (puntuacion_ambiente_promedio - 0.5) * SENSIBILIDAD_SALUD # Rango de -25 a +25
+    salud = np.clip(plantas.salud + cambio_salud_por_dia * dias_transcurridos, 0, 100) # Mantener la salud entre 0 y 100
 
-    planta.salud += cambio_salud_por_dia * dias_transcurridos
-    planta.salud = max(0, min(100, planta.salud)) # Mantener la salud entre 0 y 100
-
-    # Comprobar condición de muerte
-    if planta.salud <= 0.1: # La planta muere si la salud cae a (casi) cero
-        planta.esta_muerta = True
-        planta.salud = 0
-        planta.etapa_crecimiento = "Muerta"
-        planta.altura_cm = max(0.2, planta.altura_cm * 0.9) # Empieza a marchitarse/encogerse si está muerta
-        return # Detener el crecimiento y los cambios de etapa
+    # Comprobar condición de muerte: la planta muere si la salud cae a (casi) cero
+    mueren = vivas & (salud <= 0.1)
+    crecen = vivas & ~mueren
+    plantas.salud = np.where(mueren, 0.0, np.where(vivas, salud, plantas.salud))
+    plantas.esta_muerta = plantas.esta_muerta | mueren
+    # Las que mueren empiezan a marchitarse/encogerse
+    altura = np.where(mueren, np.maximum(0.2, plantas.altura_cm * 0.9), plantas.altura_cm)
 
     # --- Impacto en el Crecimiento ---
     # La tasa de crecimiento es proporcional a la puntuación ambiental y a la salud de la planta.
     # Ajustado para que la planta pueda alcanzar la altura máxima en ~120 días (4 meses) bajo condiciones ideales
-    tasa_crecimiento_base_cm_por_dia = 0.4125 # Crecimiento base en condiciones ideales y salud perfecta (49.5 cm en 120 días)
-    tasa_crecimiento_actual = tasa_crecimiento_base_cm_por_dia * puntuacion_ambiente_promedio * (planta.salud / 100.0)
-
-    planta.altura_cm += tasa_crecimiento_actual * dias_transcurridos
-    # Asegurarse de que la altura no exceda la altura máxima
-    planta.altura_cm = min(planta.altura_cm, planta.altura_maxima_cm)
-    planta.altura_cm = max(0.5, planta.altura_cm) # Altura mínima
-
-    # Actualizar la etapa de crecimiento según la edad y la altura (solo si no está muerta)
-    if planta.edad_dias >= 100 and planta.etapa_crecimiento != "Fructificación": # Ajustado para 4 meses
-        planta.etapa_crecimiento = "Fructificación"
-    elif planta.edad_dias >= 70 and planta.etapa_crecimiento != "Floración": # Ajustado para 4 meses
-        planta.etapa_crecimiento = "Floración"
-    elif planta.edad_dias >= 40 and planta.etapa_crecimiento != "Madura": # Ajustado para 4 meses
-        planta.etapa_crecimiento = "Madura"
-    elif planta.edad_dias >= 15 and planta.etapa_crecimiento != "Joven": # Ajustado para 4 meses
-        planta.etapa_crecimiento = "Joven"
-    elif planta.edad_dias >= 5 and planta.etapa_crecimiento != "Brote": # Ajustado para 4 meses
-        planta.etapa_crecimiento = "Brote"
+    tasa_crecimiento_actual = TASA_CRECIMIENTO_BASE_CM_POR_DIA * puntuacion_ambiente_promedio * (plantas.salud / 100.0)
+    # Sin superar la altura máxima y con una altura mínima de 0.5 cm
+    altura_crecida = np.maximum(0.5, np.minimum(altura + tasa_crecimiento_actual * dias_transcurridos, plantas.altura_maxima_cm))
+    plantas.altura_cm = np.where(crecen, altura_crecida, altura)
+
+    # Actualizar la etapa de crecimiento según la edad (solo si no está muerta)
+    etapa_por_edad = np.searchsorted(UMBRALES_ETAPA_DIAS, plantas.edad_dias, side="right").astype(np.int8)
+    plantas.etapa_idx = np.where(mueren, ETAPA_MUERTA,
+                                 np.where(crecen & (plantas.edad_dias >= UMBRALES_ETAPA_DIAS[0]), etapa_por_edad, plantas.etapa_idx)).astype(np.int8)
+
+def simular_crecimiento(planta, dias_transcurridos, lecturas_ambiente):
+    """
+    Simula el crecimiento y la salud de una planta basándose en el tiempo transcurrido y las lecturas ambientales.
+    Adaptador de simular_crecimiento_batch sobre el PlantaSoA de la planta.
+    """
+    simular_crecimiento_batch(planta.estado, dias_transcurridos, valores_ambiente(lecturas_ambiente))
+
+def _puntos_grafico_kernel(tiempos, alturas, origen_tiempo, origen_x, base_y, escala_x, escala_y, salida):
+    """Escribe en `salida` los puntos intercalados [x0, y0, x1, y1, ...]; pensado para compilarse con Numba."""
+    for i in range(tiempos.shape[0]):
+        salida[2 * i] = origen_x + (tiempos[i] - origen_tiempo) * escala_x
+        salida[2 * i + 1] = base_y - alturas[i] * escala_y
+
+_puntos_grafico_numba = njit(cache=True)(_puntos_grafico_kernel) if njit is not None else None
+
+def calcular_puntos_grafico(tiempos, alturas, origen_tiempo, margen_x, base_y, area_ancho, area_alto, max_tiempo, max_altura):
+    """
+    Convierte el historial (tiempos, alturas) en coordenadas de lienzo listas para coords()/create_line.
+    Devuelve un arreglo plano (2N,) con x e y intercalados.
+    """
+    escala_x = area_ancho / max_tiempo
+    escala_y = area_alto / max_altura
+    salida = np.empty(2 * tiempos.shape[0])
+    if _puntos_grafico_numba is not None:
+        _puntos_grafico_numba(tiempos, alturas, float(origen_tiempo), float(margen_x), float(base_y), escala_x, escala_y, salida)
+    else:
+        salida[0::2] = margen_x + (tiempos - origen_tiempo) * escala_x
+        salida[1::2] = base_y - alturas * escala_y
+    return salida
+
+def precompilar_numba():
+    """Compila (o carga de la caché) los núcleos Numba antes de abrir la ventana, para que el primer fotograma no se trabe."""
+    if njit is None:
+        return
+    simular_crecimiento_batch(PlantaSoA(1), 0.0, np.full(len(SENSORES_ORDEN), np.nan))
+    # Mismos tipos que usa el gráfico: edades float64 y alturas float32 (HistorialCircular)
+    calcular_puntos_grafico(np.zeros(2), np.zeros(2, dtype=np.float32), 0.0, 0, 0, 1, 1, 1.0, 1.0)
 
 # --- Aplicación GUI ---
 
@@ -258,7 +682,7 @@ class AuthWindow(tk.Toplevel):
         self.grab_set() # Hace que esta ventana sea modal
         self.protocol("WM_DELETE_WINDOW", self.on_closing) # Manejar cierre de ventana
 
-        self.users = load_users()
+        self.users = get_users()
 
         self.create_widgets()
 
@@ -283,9 +707,13 @@ class AuthWindow(tk.Toplevel):
     def login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
-        hashed_password = hash_password(password)
+        registro = self.users.get(username)
 
-        if username in self.users and self.users[username] == hashed_password:
+        if registro is not None and verificar_password(registro, password):
+            if isinstance(registro, str):
+                # Migrar la entrada antigua (SHA-256 sin sal) a PBKDF2 tras un login correcto
+                self.users[username] = crear_registro_usuario(password)
+                self._programar_guardado_usuarios()
             messagebox.showinfo("Login Exitoso", f"Bienvenido, {username}!")
             self.destroy()
             self.parent.show_main_app() # Llama a un método en AppInvernadero para mostrar la GUI principal
@@ -303,12 +731,19 @@ class AuthWindow(tk.Toplevel):
         if username in self.users:
             messagebox.showwarning("Registro", "El usuario ya existe.")
         else:
-            self.users[username] = hash_password(password)
-            save_users(self.users)
+            self.users[username] = crear_registro_usuario(password)
+            self._programar_guardado_usuarios()
             messagebox.showinfo("Registro Exitoso", f"Usuario {username} registrado exitosamente.")
 
+    def _programar_guardado_usuarios(self):
+        """Marca la caché de usuarios como modificada y programa su escritura en disco en 1 s."""
+        mark_users_dirty()
+        # Se programa sobre la ventana principal: esta ventana se destruye tras el login
+        self.parent.programar_guardado(flush_users, 1000)
+
     def on_closing(self):
         if messagebox.askokcancel("Salir", "¿Deseas salir de la aplicación?"):
+            flush_users()
             self.parent.destroy() # Cierra la aplicación principal si se cierra la ventana de login
 
 
@@ -321,27 +756,56 @@ class AppInvernadero(tk.Tk):
         self.configure(bg="#212121")
         self.resizable(True, True)
 
+        # Fuentes de los lienzos, creadas una vez y compartidas por todos los textos dibujados
+        self._font_small = tkfont.Font(self, family="Arial", size=8)
+        self._font_axis = tkfont.Font(self, family="Arial", size=9)
+        self._font_med = tkfont.Font(self, family="Arial", size=10)
+        self._font_med_bold = tkfont.Font(self, family="Arial", size=10, weight="bold")
+
         self.planta = Planta(nombre="Corona de Cristo", etapa_crecimiento="Semilla", edad_dias=0, altura_cm=0.5)
         self.ultima_actualizacion_tiempo = datetime.datetime.now()
 
         # Historial de valores para el gráfico de barras (para Agua)
-        self.historial_agua = []
         self.max_historial_agua = 10
 
         # Historial de altura de la planta para el gráfico
-        self.historial_altura = []
-        self.historial_tiempo_dias = []
         self.max_puntos_grafico = 150
+        self._reiniciar_historiales()
 
         # Estado del tanque de agua y bomba (actualizados por MQTT)
         self.nivel_tanque_agua = 100
         self.bomba_activa = False
         self.fotograma_animacion_bomba = 0
+        # Lienzos que hay que redibujar en el próximo tick lento (_redibujar_lienzos)
+        self._dirty = {"planta": True, "agua": True, "altura": True, "tanque": True}
+        # (estado discreto, altura_cm, salud) del último dibujo de la planta; ver actualizar_gui
+        self._firma_planta = None
+        # Ids persistentes de los items de la planta (se crean una vez; luego coords/itemconfigure)
+        self._planta_items = None
+        # Hay un dibujo de la planta pendiente en after_idle (ver _programar_dibujo_planta)
+        self._dibujo_planta_pendiente = False
+        # Marco del invernadero ya rasterizado: ((ancho, alto), PhotoImage) del último tamaño dibujado
+        self._marco_cache = None
+        # Desplazamientos de las gotas precalculados por fotograma (efecto puramente visual)
+        self._pump_jitter = [[(random.randint(-2, 2), random.randint(-2, 2)) for _ in range(5)] for _ in range(5)]
         self.alerta_led_activo = False
 
         self.esp32_wifi_status = "Desconocido"
         self.etiqueta_esp32_wifi_status = None
 
+        # Anillo de mensajes MQTT pendientes; el hilo de Tk lo vacía periódicamente en _drain_ring
+        self._mqtt_ring = AnilloMensajesMQTT(TAMANO_ANILLO_MQTT)
+        # Publicaciones salientes pendientes (tema, carga, qos); se envían juntas en _flush_mqtt
+        self._mqtt_outbox = collections.deque()
+        self._mqtt_flush_scheduled = False
+        # Sesión HTTP reutilizable (keep-alive) para hablar con el ESP32 en modo AP
+        self._http = requests.Session()
+        self._http.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        # Activo mientras un valor llegado por MQTT mueve un deslizador (evita el eco de su command=)
+        self._suppress_scale_cb = False
+        # after() pendiente que aplicará los valores de los deslizadores (None = ninguno)
+        self._actualizacion_deslizadores_pendiente = None
+
         # Inicializar los diccionarios de etiquetas aquí (solo una vez)
         self.etiquetas_estado = {}
         self.etiquetas_planta_info = {}
@@ -366,143 +830,253 @@ class AppInvernadero(tk.Tk):
         self.img_coronaplanta = None
         self.img_temp_sensor = None
 
+        # Originales PIL decodificados una sola vez y PhotoImages ya redimensionados por (archivo, ancho, alto)
+        self._pil_originals = {}
+        self._resized_cache = {}
+
         try:
-            self.img_control_general = ImageTk.PhotoImage(Image.open("icono_control.png"))
-            self.img_notificacion = ImageTk.PhotoImage(Image.open("icono_alerta.png"))
-            self.img_sensor = ImageTk.PhotoImage(Image.open("icono_sensor.png"))
-            self.img_info_planta = ImageTk.PhotoImage(Image.open("icono_planta_info.png"))
+            # Los lienzos de imágenes miden 50 px de alto; el de controles generales abarca dos filas
+            self.img_control_general = _load_icon("icono_control.png", (100, 100))
+            self.img_notificacion = _load_icon("icono_alerta.png", (50, 50))
+            self.img_sensor = _load_icon("icono_sensor.png", (50, 50))
+            self.img_info_planta = _load_icon("icono_planta_info.png", (50, 50))
 
-            self.img_coronaplanta = ImageTk.PhotoImage(Image.open("coronaplanta.png"))
-            self.img_temp_sensor = ImageTk.PhotoImage(Image.open("temp.png"))
+            self.img_coronaplanta = _load_icon("coronaplanta.png", (50, 50))
+            self.img_temp_sensor = _load_icon("temp.png", (50, 50))
+
+            # Imágenes que se reescalan al tamaño de su lienzo en cada <Configure>
+            for filename in ("icono_control.png", "coronaplanta.png", "temp.png"):
+                with Image.open(filename) as imagen:
+                    self._pil_originals[filename] = imagen.copy()
 
         except Exception as e:
             print(f"ERROR AL CARGAR UNA IMAGEN: {e}. Asegúrate de que la ruta sea correcta y el formato compatible (PNG/JPG con Pillow, GIF directo).")
         # FIN DE MODIFICACIÓN
 
+        # Escrituras diferidas pendientes: función flush_* -> id de after
+        self._guardados_programados = {}
+        # Redibujados diferidos de lienzos tras <Configure>: clave -> id de after
+        self._redibujos_pendientes = {}
+        # Items persistentes de cada lienzo: clave -> (lienzo, (ancho, alto), ids)
+        self._items_lienzo = {}
+        # after() que despertará verificar_riego_programado en el próximo disparo
+        self._riego_after_id = None
+        # Barra de avisos no modales (se crea en crear_widgets) y after() que la vaciará
+        self._etiqueta_aviso = None
+        self._aviso_after_id = None
+
         # Iniciar la ventana de autenticación
         self.auth_window = AuthWindow(self)
 
-        # Hilo para verificar el riego programado
-        self.irrigation_check_thread = threading.Thread(target=self.verificar_riego_programado, daemon=True)
-        self.irrigation_check_thread.start()
-
         # Variable para controlar el estado del riego automático por sensor
         self.riego_automatico_activo = False
 
+        _configure_styles(self) # Estilos ttk, una sola vez por aplicación
+
+
+    def programar_guardado(self, flush, retraso_ms=500):
+        """
+        Programa una escritura diferida (flush_config, flush_schedule, flush_users).
+        Si ya había una pendiente para la misma función se reprograma, de modo que una
+        ráfaga de cambios termina en una sola escritura a disco.
+        """
+        id_previo = self._guardados_programados.get(flush)
+        if id_previo is not None:
+            self.after_cancel(id_previo)
+        self._guardados_programados[flush] = self.after(retraso_ms, flush)
 
     def show_main_app(self):
         """Muestra la ventana principal después de un login exitoso."""
         self.deiconify() # Muestra la ventana principal
         self.crear_widgets() # Crea los widgets de la GUI principal
 
+        # Tabla de despacho tema MQTT -> manejador (búsqueda O(1) en lugar de una cadena if/elif)
+        self._handlers = {
+            "invernadero/temperatura": self._h_temp,
+            "invernadero/humedad_aire": self._h_hum_aire,
+            "invernadero/humedad_suelo": self._h_hum_suelo,
+            "invernadero/luz": self._h_luz,
+            "invernadero/nivel_agua": self._h_nivel_agua,
+            "invernadero/bomba_estado": self._h_bomba_estado,
+            "invernadero/control_led_alerta": self._h_led_alerta,
+            "invernadero/status/wifi_connect": self._h_wifi_status,
+            "invernadero/status/riego_auto_sensor": self._h_riego_auto,
+            "invernadero/wifi/scan_results": self._h_scan_results,
+        }
+        self.after(30, self._drain_ring) # Consumidor de mensajes MQTT en el hilo de Tk
+
         # Configurar el cliente MQTT de la GUI
         self.cliente_mqtt_gui = mqtt.Client(client_id=ID_CLIENTE_GUI_MQTT)
         self.cliente_mqtt_gui.on_connect = self._al_conectar_gui
         self.cliente_mqtt_gui.on_message = self._al_recibir_mensaje_gui
         self.cliente_mqtt_gui.reconnect_delay_set(min_delay=1, max_delay=120)
+        # Evitar bloqueos en cabeza de cola si los comandos pasan a QoS > 0
+        self.cliente_mqtt_gui.max_inflight_messages_set(100)
+        self.cliente_mqtt_gui.max_queued_messages_set(1000)
         self.cliente_mqtt_gui.connect(BROKER_MQTT_HOST, BROKER_MQTT_PUERTO, 60)
         self.cliente_mqtt_gui.loop_start() # Iniciar el bucle en segundo segundo plano
 
         self.actualizar_lecturas_ambiente_desde_deslizadores() # Cargar valores iniciales de los deslizadores en lecturas_actuales
         self.dibujar_marco_invernadero(self.lienzo_animacion_planta) # Dibujo inicial del marco del invernadero
-        self.dibujar_planta() # Dibujo inicial de la planta
+        self._programar_dibujo_planta() # Dibujo inicial de la planta
         self.dibujar_tanque_agua() # Dibujo inicial del tanque de agua
         self.dibujar_indicador_alerta_led() # Dibujo inicial del indicador del LED de alerta
-        self.after(100, self.actualizar_gui) # Programar la primera actualización de la GUI después de un breve retraso
+        self.after(100, self._tick_gui) # Primera actualización de etiquetas tras un breve retraso; se reprograma cada 500 ms
+        self.after(1000, self._tick_lienzos) # Redibujado de lienzos, independiente de las etiquetas
+        # El índice se construyó al importar; los horarios vencidos mientras la ventana de login
+        # estaba abierta no deben dispararse al entrar
+        actualizar_indice_horarios()
+        self.verificar_riego_programado() # Primera comprobación de horarios de riego; se reprograma con after
 
     def _al_conectar_gui(self, cliente, datos_usuario, banderas, codigo_retorno):
         if codigo_retorno == 0:
-            print("GUI MQTT: Conectado al broker MQTT exitosamente!")
-            for tema in TEMAS_MQTT:
-                cliente.subscribe(tema)
-                print(f"GUI MQTT: Suscrito a: {tema}")
+            log.info("GUI MQTT: Conectado al broker MQTT exitosamente!")
+            # Un solo paquete SUBSCRIBE con todos los temas
+            cliente.subscribe(_SUBSCRIBE_ARG)
+            log.info("GUI MQTT: Suscrito a %d temas", len(_SUBSCRIBE_ARG))
+            # Desactivar Nagle: los comandos son paquetes pequeños y no deben esperar a agruparse
+            sock = cliente.socket()
+            if sock:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         else:
-            print(f"GUI MQTT: Fallo al conectar, código de retorno: {codigo_retorno}\n")
+            log.error("GUI MQTT: Fallo al conectar, código de retorno: %s", codigo_retorno)
 
     def _al_recibir_mensaje_gui(self, cliente, datos_usuario, mensaje):
-        """Se llama cuando se recibe un mensaje del broker MQTT (para la GUI)."""
+        """Se llama cuando se recibe un mensaje del broker MQTT (para la GUI).
+        Se ejecuta en el hilo de red de paho: solo encola el tema y la carga sin decodificar.
+        """
+        self._mqtt_ring.push((mensaje.topic, mensaje.payload))
+
+    def _drain_ring(self):
+        """Vacía el anillo de mensajes MQTT en el hilo de Tk y se vuelve a programar."""
+        mensajes = self._mqtt_ring.drain()
+        if mensajes:
+            self._flush_mqtt_batch(mensajes)
+        self.after(30, self._drain_ring)
+
+    def _flush_mqtt_batch(self, mensajes):
+        """
+        Procesa un lote de mensajes MQTT en el hilo de Tk. Solo se procesa el último valor
+        de cada tema y cada etiqueta de valor se actualiza una sola vez por lote.
+        """
+        ultimos_por_tema = {}
+        for tema, carga_util in mensajes:
+            ultimos_por_tema[tema] = carga_util
+
+        etiquetas_sucias = set()
+        obtener_manejador = self._handlers.get # Enlazado una vez fuera del bucle
+        for tema, carga_util in ultimos_por_tema.items():
+            try:
+                log.debug("MQTT recibido: tema=%s carga=%r", tema, carga_util)
+                manejador = obtener_manejador(tema)
+                if manejador and manejador(carga_util):
+                    etiquetas_sucias.add(tema)
+            except ValueError as ve:
+                log.error("GUI MQTT: Error al convertir datos MQTT: %s para mensaje %r en tema %s", ve, carga_util, tema)
+            except Exception as e:
+                log.exception("GUI MQTT: Error general al procesar el mensaje MQTT: %s", e)
+
+        # Forzar actualización de etiquetas de deslizadores después de recibir MQTT
+        # Estas líneas son importantes para que los deslizadores y sus etiquetas reflejen el valor recibido
+        if "invernadero/temperatura" in etiquetas_sucias:
+            self._actualizar_etiqueta("valor_temp", text=f"{lecturas_actuales['temperatura']:.1f}°C")
+        if "invernadero/humedad_aire" in etiquetas_sucias:
+            self._actualizar_etiqueta("valor_humedad_aire", text=f"{lecturas_actuales['humedad_aire']:.1f}%")
+        if "invernadero/luz" in etiquetas_sucias:
+            self._actualizar_etiqueta("valor_luz", text=f"{lecturas_actuales['luz']:.0f}")
+        if "invernadero/humedad_suelo" in etiquetas_sucias:
+            self._actualizar_etiqueta("valor_humedad_suelo", text=f"{lecturas_actuales['humedad_suelo']:.0f}")
+
+    def _set_deslizador_sin_eco(self, deslizador, valor):
+        """
+        Mueve un deslizador a un valor recibido por MQTT sin que su command= vuelva a leer
+        todos los deslizadores: lecturas_actuales y la etiqueta ya se actualizan en el lote.
+        """
+        self._suppress_scale_cb = True
         try:
-            carga_util_str = mensaje.payload.decode()
-            print(f"DEBUG MQTT RECIBIDO: Tema='{mensaje.topic}', Carga='{carga_util_str}'")
-
-            # Actualizar lecturas_actuales con los datos recibidos del ESP32 real
-            if mensaje.topic == "invernadero/temperatura":
-                lecturas_actuales["temperatura"] = float(carga_util_str)
-                print(f"DEBUG: Temperatura actualizada a {lecturas_actuales['temperatura']}")
-                self.deslizador_temp.set(lecturas_actuales["temperatura"]) # Actualizar deslizador
-            elif mensaje.topic == "invernadero/humedad_aire":
-                lecturas_actuales["humedad_aire"] = float(carga_util_str)
-                print(f"DEBUG: Humedad Aire actualizada a {lecturas_actuales['humedad_aire']}")
-                self.deslizador_humedad_aire.set(lecturas_actuales["humedad_aire"])
-            elif mensaje.topic == "invernadero/humedad_suelo":
-                lecturas_actuales["humedad_suelo"] = int(carga_util_str)
-                print(f"DEBUG: Humedad Suelo actualizada a {lecturas_actuales['humedad_suelo']}")
-                self.deslizador_humedad_suelo.set(lecturas_actuales["humedad_suelo"])
-            elif mensaje.topic == "invernadero/luz":
-                lecturas_actuales["luz"] = int(carga_util_str)
-                print(f"DEBUG: Luz actualizada a {lecturas_actuales['luz']}")
-                self.deslizador_luz.set(lecturas_actuales["luz"])
-            elif mensaje.topic == "invernadero/nivel_agua":
-                # ESP32 ahora envía el porcentaje directamente (0-100)
-                self.nivel_tanque_agua = int(carga_util_str)
-                print(f"DEBUG: Nivel Agua actualizado a {self.nivel_tanque_agua}")
-            elif mensaje.topic == "invernadero/bomba_estado":
-                self.bomba_activa = (carga_util_str == "ON")
-                print(f"DEBUG: Bomba activa: {self.bomba_activa}")
-            elif mensaje.topic == "invernadero/control_led_alerta":
-                self.alerta_led_activo = (carga_util_str == "ON")
-                print(f"DEBUG: LED Alerta activo: {self.alerta_led_activo}")
-                self.dibujar_indicador_alerta_led() # Actualizar visualmente el indicador
-            elif mensaje.topic == "invernadero/status/wifi_connect":
-                self.esp32_wifi_status = carga_util_str
-                print(f"DEBUG: Estado WiFi del ESP32: {self.esp32_wifi_status}")
-                self.actualizar_estado_wifi_esp32_gui() # Actualizar la etiqueta en la GUI
-            # --- CAMBIO: Manejo del estado del riego automático por sensor ---
-            elif mensaje.topic == "invernadero/status/riego_auto_sensor":
-                if carga_util_str == "ON":
-                    self.riego_automatico_activo = True
-                    self.boton_riego_auto_sensor.config(text="Desactivar Riego Auto (Sensor)", style="TButton")
-                else:
-                    self.riego_automatico_activo = False
-                    self.boton_riego_auto_sensor.config(text="Activar Riego Auto (Sensor)", style="TButton")
-                print(f"DEBUG: Riego automático por sensor: {carga_util_str}")
-            # --- FIN CAMBIO ---
-            # --- CAMBIO: Manejo de resultados de escaneo WiFi (para WiFiScannerGUI) ---
-            elif mensaje.topic == "invernadero/wifi/scan_results":
-                # Esta parte es para la clase WiFiScannerGUI, si se usa.
-                # La AppInvernadero principal no la usa directamente, pero es bueno tenerla aquí.
-                try:
-                    scan_data = json.loads(carga_util_str)
-                    print(f"DEBUG: Resultados de escaneo WiFi: {scan_data}")
-                    # Si tu AppInvernadero principal necesita mostrar esto, lo harías aquí.
-                    # Por ahora, solo se imprime.
-                except json.JSONDecodeError:
-                    print(f"ERROR: No se pudo decodificar JSON de resultados de escaneo: {carga_util_str}")
-            # --- FIN CAMBIO ---
-
-            # Forzar actualización de etiquetas de deslizadores después de recibir MQTT
-            # Estas líneas son importantes para que los deslizadores y sus etiquetas reflejen el valor recibido
-            self.etiqueta_valor_temp.config(text=f"{lecturas_actuales['temperatura']:.1f}°C")
-            self.etiqueta_valor_humedad_aire.config(text=f"{lecturas_actuales['humedad_aire']:.1f}%")
-            self.etiqueta_valor_luz.config(text=f"{lecturas_actuales['luz']:.0f}")
-            self.etiqueta_valor_humedad_suelo.config(text=f"{lecturas_actuales['humedad_suelo']:.0f}")
-
-        except ValueError as ve:
-            print(f"ERROR GUI MQTT: Error al convertir datos MQTT: {ve} para mensaje '{mensaje.payload.decode()}' en tema '{mensaje.topic}'")
-        except Exception as e:
-            print(f"ERROR GUI MQTT: Error general al procesar el mensaje MQTT: {e}")
+            deslizador.set(valor)
+        finally:
+            self._suppress_scale_cb = False
+
+    # --- Manejadores de temas MQTT (se ejecutan en el hilo de Tk) ---
+    # Reciben la carga en bytes: los temas numéricos la convierten directamente con float()/int()
+    # y solo los temas de texto/JSON la decodifican. Devuelven True si el mensaje cambió una
+    # de las lecturas de los deslizadores.
+
+    def _h_temp(self, carga_util):
+        lecturas_actuales["temperatura"] = float(carga_util)
+        log.debug("Temperatura actualizada a %s", lecturas_actuales["temperatura"])
+        self._set_deslizador_sin_eco(self.deslizador_temp, lecturas_actuales["temperatura"]) # Actualizar deslizador
+        return True
+
+    def _h_hum_aire(self, carga_util):
+        lecturas_actuales["humedad_aire"] = float(carga_util)
+        log.debug("Humedad Aire actualizada a %s", lecturas_actuales["humedad_aire"])
+        self._set_deslizador_sin_eco(self.deslizador_humedad_aire, lecturas_actuales["humedad_aire"])
+        return True
+
+    def _h_hum_suelo(self, carga_util):
+        lecturas_actuales["humedad_suelo"] = int(carga_util)
+        log.debug("Humedad Suelo actualizada a %s", lecturas_actuales["humedad_suelo"])
+        self._set_deslizador_sin_eco(self.deslizador_humedad_suelo, lecturas_actuales["humedad_suelo"])
+        return True
+
+    def _h_luz(self, carga_util):
+        lecturas_actuales["luz"] = int(carga_util)
+        log.debug("Luz actualizada a %s", lecturas_actuales["luz"])
+        self._set_deslizador_sin_eco(self.deslizador_luz, lecturas_actuales["luz"])
+        return True
+
+    def _h_nivel_agua(self, carga_util):
+        # ESP32 ahora envía el porcentaje directamente (0-100)
+        self.nivel_tanque_agua = int(carga_util)
+        self._dirty["tanque"] = True
+        log.debug("Nivel Agua actualizado a %s", self.nivel_tanque_agua)
+
+    def _h_bomba_estado(self, carga_util):
+        self.bomba_activa = (carga_util == b"ON")
+        self._dirty["tanque"] = True
+        log.debug("Bomba activa: %s", self.bomba_activa)
+
+    def _h_led_alerta(self, carga_util):
+        self.alerta_led_activo = (carga_util == b"ON")
+        log.debug("LED Alerta activo: %s", self.alerta_led_activo)
+        self.dibujar_indicador_alerta_led() # Actualizar visualmente el indicador
+
+    def _h_wifi_status(self, carga_util):
+        carga_util_str = carga_util.decode()
+        self.esp32_wifi_status = carga_util_str
+        log.debug("Estado WiFi del ESP32: %s", self.esp32_wifi_status)
+        self.actualizar_estado_wifi_esp32_gui() # Actualizar la etiqueta en la GUI
+
+    def _h_riego_auto(self, carga_util):
+        """Manejo del estado del riego automático por sensor."""
+        carga_util_str = carga_util.decode()
+        if carga_util_str == "ON":
+            self.riego_automatico_activo = True
+            self.boton_riego_auto_sensor.config(text="Desactivar Riego Auto (Sensor)", style="TButton")
+        else:
+            self.riego_automatico_activo = False
+            self.boton_riego_auto_sensor.config(text="Activar Riego Auto (Sensor)", style="TButton")
+        log.debug("Riego automático por sensor: %s", carga_util_str)
+
+    def _h_scan_results(self, carga_util):
+        """Manejo de resultados de escaneo WiFi (para WiFiScannerGUI)."""
+        # Esta parte es para la clase WiFiScannerGUI, si se usa.
+        # La AppInvernadero principal no la usa directamente, pero es bueno tenerla aquí.
+        try:
+            scan_data = cargar_json(carga_util) # orjson.JSONDecodeError hereda de json.JSONDecodeError
+            log.debug("Resultados de escaneo WiFi: %s", scan_data)
+            # Si tu AppInvernadero principal necesita mostrar esto, lo harías aquí.
+            # Por ahora, solo se imprime.
+        except json.JSONDecodeError:
+            # Solo se pasa a str para el registro del error
+            log.error("No se pudo decodificar JSON de resultados de escaneo: %s", carga_util.decode(errors="replace"))
 
     def crear_widgets(self):
-        # Configuración de estilos para un look más "oscuro" y "redondeado"
-        estilo = ttk.Style(self)
-        estilo.theme_use('clam')
-        estilo.configure("TLabel", background="#333333", foreground="white", font=("Arial", 10))
-        estilo.configure("TFrame", background="#333333", borderwidth=0, relief="flat")
-        estilo.configure("TLabelframe", background="#333333", foreground="white", relief="solid", borderwidth=2, bordercolor="#424242")
-        estilo.configure("TLabelframe.Label", background="#333333", foreground="white", font=("Arial", 11, "bold"))
-        estilo.configure("TScale", background="#333333", troughcolor="#424242", slidercolor="#616161")
-        estilo.configure("TButton", background="#424242", foreground="white", font=("Arial", 10, "bold"), relief="raised")
-        estilo.map("TButton", background=[('active', '#525252')])
+        # Barra de avisos al pie; se empaqueta antes que el Notebook para que este no la tape
+        self._etiqueta_aviso = ttk.Label(self, text="", anchor="w")
+        self._etiqueta_aviso.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
 
         # Crear el Notebook (sistema de pestañas)
         self.notebook = ttk.Notebook(self)
@@ -513,14 +1087,7 @@ class AppInvernadero(tk.Tk):
         self.notebook.add(self.frame_simulacion, text="Simulación Invernadero")
 
         # Configurar el grid para la pestaña de simulación
-        self.frame_simulacion.grid_rowconfigure(0, weight=1)
-        self.frame_simulacion.grid_rowconfigure(1, weight=1)
-        self.frame_simulacion.grid_rowconfigure(2, weight=1)
-        self.frame_simulacion.grid_rowconfigure(3, weight=0)
-
-        self.frame_simulacion.grid_columnconfigure(0, weight=1)
-        self.frame_simulacion.grid_columnconfigure(1, weight=2)
-        self.frame_simulacion.grid_columnconfigure(2, weight=1)
+        self._configure_grid(self.frame_simulacion, rows=(1, 1, 1, 0), cols=(1, 2, 1))
 
         # Reubicar los paneles existentes dentro de self.frame_simulacion
         # Panel 1: Tanque de Agua y Bomba (Superior Izquierda)
@@ -543,7 +1110,7 @@ class AppInvernadero(tk.Tk):
         self.marco_vista_invernadero.grid(row=0, column=1, rowspan=2, padx=5, pady=5, sticky="nsew")
         self.lienzo_animacion_planta = tk.Canvas(self.marco_vista_invernadero, bg="#263238", highlightthickness=0)
         self.lienzo_animacion_planta.pack(expand=True, fill="both", padx=10, pady=10)
-        self.lienzo_animacion_planta.bind("<Configure>", self.redimensionar_lienzo_animacion_planta)
+        self.lienzo_animacion_planta.bind("<Configure>", lambda event: self._programar_redibujo("animacion_planta", self.redimensionar_lienzo_animacion_planta))
 
         # Gráfico de Altura (Centro Inferior)
         self.marco_grafico_altura = ttk.LabelFrame(self.frame_simulacion, text="Gráfico: Altura de la Planta vs. Tiempo", padding="10", style="TLabelframe")
@@ -578,71 +1145,153 @@ class AppInvernadero(tk.Tk):
         # Pestaña de Programación de Riego
         self.frame_riego = ttk.Frame(self.notebook, style="TFrame")
         self.notebook.add(self.frame_riego, text="Programación de Riego")
-        self.crear_widgets_programacion_riego(self.frame_riego)
 
         # Pestaña de Rangos de Sensores
         self.frame_rangos = ttk.Frame(self.notebook, style="TFrame")
         self.notebook.add(self.frame_rangos, text="Rangos de Sensores")
-        self.crear_widgets_rangos_sensores(self.frame_rangos)
 
+        # El contenido de las pestañas secundarias se crea la primera vez que se abren
+        self._pestanas_pendientes = {
+            str(self.frame_riego): lambda: self.crear_widgets_programacion_riego(self.frame_riego),
+            str(self.frame_rangos): lambda: self.crear_widgets_rangos_sensores(self.frame_rangos),
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._al_cambiar_pestana)
+
+        # Métodos config de las etiquetas que actualizar_gui refresca en cada tick, resueltos una vez
+        self._label_setters = {clave: etiqueta.config for clave, etiqueta in self.etiquetas_planta_info.items()}
+        self._label_setters.update({
+            "notificacion": self.etiqueta_notificacion.config,
+            "sens_temp": self.etiqueta_sens_temp.config,
+            "sens_hum_aire": self.etiqueta_sens_hum_aire.config,
+            "sens_hum_suelo": self.etiqueta_sens_hum_suelo.config,
+            "sens_luz": self.etiqueta_sens_luz.config,
+            "valor_temp": self.etiqueta_valor_temp.config,
+            "valor_humedad_aire": self.etiqueta_valor_humedad_aire.config,
+            "valor_luz": self.etiqueta_valor_luz.config,
+            "valor_humedad_suelo": self.etiqueta_valor_humedad_suelo.config,
+            "wifi": self.etiqueta_esp32_wifi_status.config,
+        })
+        # Última configuración aplicada a cada etiqueta: clave -> opciones de config
+        self._last_text = {}
+
+    def _actualizar_etiqueta(self, clave, **opciones):
+        """Aplica config(**opciones) a la etiqueta `clave` solo si cambió algo desde la última vez."""
+        if self._last_text.get(clave) != opciones:
+            self._label_setters[clave](**opciones)
+            self._last_text[clave] = opciones
+
+    def _al_cambiar_pestana(self, evento=None):
+        """Construye los widgets de la pestaña seleccionada si todavía no existen."""
+        construir = self._pestanas_pendientes.pop(self.notebook.select(), None)
+        if construir is not None:
+            construir()
+
+
+    def _configure_grid(self, widget, rows=None, cols=None):
+        """
+        Asigna los pesos de filas y columnas de `widget` con una llamada a Tk por cada peso
+        distinto (grid acepta una lista de índices). rows/cols: pesos en orden de índice.
+        Conviene llamarlo antes de colocar los hijos.
+        """
+        for configurar, pesos in ((widget.grid_rowconfigure, rows), (widget.grid_columnconfigure, cols)):
+            if not pesos:
+                continue
+            indices_por_peso = {}
+            for indice, peso in enumerate(pesos):
+                indices_por_peso.setdefault(peso, []).append(indice)
+            for peso, indices in indices_por_peso.items():
+                configurar(tuple(indices), weight=peso)
 
     def crear_widgets_tanque_agua(self, marco_padre):
         self.lienzo_tanque_agua = tk.Canvas(marco_padre, bg="#263238", highlightthickness=0, width=150, height=150)
         self.lienzo_tanque_agua.pack(expand=True, fill="both", padx=5, pady=5)
-        self.lienzo_tanque_agua.bind("<Configure>", lambda event: self.dibujar_tanque_agua())
+        self.lienzo_tanque_agua.bind("<Configure>", lambda event: self._programar_redibujo("tanque_agua", self.dibujar_tanque_agua))
 
         self.boton_rellenar_tanque = ttk.Button(marco_padre, text="Rellenar Tanque (Solo GUI)", command=self.rellenar_tanque_agua, style="TButton")
         self.boton_rellenar_tanque.pack(pady=5)
 
+    def _items_lienzo_para_tamano(self, clave, lienzo, ancho, alto, crear):
+        """Devuelve los ids de los items persistentes de un lienzo.
+
+        Solo se borra y se recrea el contenido (`crear`) cuando cambia el lienzo
+        o su tamaño; en el resto de redibujados basta con coords/itemconfigure.
+        """
+        cache = self._items_lienzo.get(clave)
+        if cache is None or cache[0] is not lienzo or cache[1] != (ancho, alto):
+            lienzo.delete("all")
+            cache = (lienzo, (ancho, alto), crear(lienzo, ancho, alto))
+            self._items_lienzo[clave] = cache
+        return cache[2]
+
+    def _geometria_tanque(self, lienzo_ancho, lienzo_alto):
+        # Dimensiones del tanque (proporcionales al lienzo)
+        ancho_tanque = lienzo_ancho * 0.7
+        alto_tanque = lienzo_alto * 0.8
+        tanque_x1 = (lienzo_ancho - ancho_tanque) / 2
+        tanque_y1 = (lienzo_alto - alto_tanque) / 2
+        return tanque_x1, tanque_y1, tanque_x1 + ancho_tanque, tanque_y1 + alto_tanque
+
+    def _crear_items_tanque(self, lienzo, lienzo_ancho, lienzo_alto):
+        tanque_x1, tanque_y1, tanque_x2, tanque_y2 = self._geometria_tanque(lienzo_ancho, lienzo_alto)
+        items = {}
+        # Contorno del tanque
+        lienzo.create_rectangle(tanque_x1, tanque_y1, tanque_x2, tanque_y2, outline="#90A4AE", width=2)
+        # Nivel del agua (las coordenadas se fijan en cada redibujado)
+        items["agua"] = lienzo.create_rectangle(tanque_x1 + 1, tanque_y2 - 1, tanque_x2 - 1, tanque_y2 - 1, fill="#2196F3", outline="")
+
+        # Dibujar la bomba y la salida de agua
+        bomba_x = tanque_x2 + 5
+        bomba_y = tanque_y2 - 20
+        lienzo.create_rectangle(bomba_x, bomba_y, bomba_x + 10, bomba_y + 20, fill="#757575", outline="#424242")
+        lienzo.create_line(bomba_x + 5, bomba_y + 10, tanque_x2, tanque_y2 - 10, fill="#757575", width=2)
+
+        # Gotas de la animación de la bomba: se crean ocultas y solo se mueven
+        items["gotas"] = [
+            lienzo.create_oval(0, 0, 0, 0, fill="#81D4FA", outline="#2196F3", tags="agua_bomba", state="hidden")
+            for _ in range(4)
+        ]
+        items["porcentaje"] = lienzo.create_text(lienzo_ancho / 2, tanque_y1 + 15, text="", fill="white", font=self._font_med_bold)
+        return items
+
     def dibujar_tanque_agua(self, evento=None):
         lienzo = self.lienzo_tanque_agua
         if not lienzo or not lienzo.winfo_exists():
             return
 
-        lienzo.delete("all")
         lienzo_ancho = lienzo.winfo_width()
         lienzo_alto = lienzo.winfo_height()
 
         if lienzo_ancho < 50 or lienzo_alto < 50: return
 
-        # Dimensiones del tanque (proporcionales al lienzo)
-        ancho_tanque = lienzo_ancho * 0.7
-        alto_tanque = lienzo_alto * 0.8
-        tanque_x1 = (lienzo_ancho - ancho_tanque) / 2
-        tanque_y1 = (lienzo_alto - alto_tanque) / 2
-        tanque_x2 = tanque_x1 + ancho_tanque
-        tanque_y2 = tanque_y1 + alto_tanque
-
-        # Dibujar el contorno del tanque
-        lienzo.create_rectangle(tanque_x1, tanque_y1, tanque_x2, tanque_y2, outline="#90A4AE", width=2)
+        items = self._items_lienzo_para_tamano("tanque_agua", lienzo, lienzo_ancho, lienzo_alto, self._crear_items_tanque)
+        tanque_x1, tanque_y1, tanque_x2, tanque_y2 = self._geometria_tanque(lienzo_ancho, lienzo_alto)
 
-        # Dibujar el nivel del agua
-        altura_llenado_agua = alto_tanque * (self.nivel_tanque_agua / 100.0)
+        # Actualizar el nivel del agua
+        altura_llenado_agua = (tanque_y2 - tanque_y1) * (self.nivel_tanque_agua / 100.0)
         agua_y1 = tanque_y2 - altura_llenado_agua
-        lienzo.create_rectangle(tanque_x1 + 1, agua_y1, tanque_x2 - 1, tanque_y2 - 1, fill="#2196F3", outline="")
+        lienzo.coords(items["agua"], tanque_x1 + 1, agua_y1, tanque_x2 - 1, tanque_y2 - 1)
 
-        # Dibujar la bomba y la salida de agua
         bomba_x = tanque_x2 + 5
         bomba_y = tanque_y2 - 20
-        lienzo.create_rectangle(bomba_x, bomba_y, bomba_x + 10, bomba_y + 20, fill="#757575", outline="#424242")
-        lienzo.create_line(bomba_x + 5, bomba_y + 10, tanque_x2, tanque_y2 - 10, fill="#757575", width=2)
 
         # La animación de la bomba ahora depende de self.bomba_activa (controlada por MQTT)
+        visibles = self.fotograma_animacion_bomba if self.bomba_activa else 0
+        jitter = self._pump_jitter[self.fotograma_animacion_bomba]
+        for i, gota in enumerate(items["gotas"]):
+            if i < visibles:
+                desplazamiento_x, desplazamiento_y = jitter[i]
+                lienzo.coords(gota, bomba_x + 2 + desplazamiento_x, bomba_y + 25 + (i*3) + desplazamiento_y,
+                              bomba_x + 8 + desplazamiento_x, bomba_y + 31 + (i*3) + desplazamiento_y)
+                lienzo.itemconfigure(gota, state="normal")
+            else:
+                lienzo.itemconfigure(gota, state="hidden")
         if self.bomba_activa:
-            # Animación de agua saliendo
-            for i in range(self.fotograma_animacion_bomba):
-                desplazamiento_x = random.randint(-2, 2)
-                desplazamiento_y = random.randint(-2, 2)
-                lienzo.create_oval(bomba_x + 2 + desplazamiento_x, bomba_y + 25 + (i*3) + desplazamiento_y,
-                                   bomba_x + 8 + desplazamiento_x, bomba_y + 31 + (i*3) + desplazamiento_y,
-                                   fill="#81D4FA", outline="#2196F3", tags="agua_bomba")
             self.fotograma_animacion_bomba = (self.fotograma_animacion_bomba + 1) % 5
         else:
             self.fotograma_animacion_bomba = 0
-            lienzo.delete("agua_bomba")
 
         # Mostrar el porcentaje del tanque
-        lienzo.create_text(lienzo_ancho / 2, tanque_y1 + 15, text=f"{self.nivel_tanque_agua:.0f}%", fill="white", font=("Arial", 10, "bold"))
+        lienzo.itemconfigure(items["porcentaje"], text=f"{self.nivel_tanque_agua:.0f}%")
 
 
     def rellenar_tanque_agua(self):
@@ -651,19 +1300,25 @@ class AppInvernadero(tk.Tk):
         print("Tanque de agua rellenado (solo visualmente en la GUI).")
 
 
-    def redimensionar_lienzo_animacion_planta(self, evento):
+    def _programar_redibujo(self, clave, fn, retraso_ms=50):
+        """
+        Agrupa una ráfaga de eventos <Configure> en un solo redibujado: cada llamada cancela
+        el redibujado pendiente con la misma clave y programa uno nuevo dentro de retraso_ms.
+        """
+        id_previo = self._redibujos_pendientes.get(clave)
+        if id_previo is not None:
+            self.after_cancel(id_previo)
+        self._redibujos_pendientes[clave] = self.after(retraso_ms, fn)
+
+    def redimensionar_lienzo_animacion_planta(self, evento=None):
         """Redibuja el invernadero y la planta cuando el lienzo de la ventana de animación cambia de tamaño."""
         if self.lienzo_animacion_planta:
             self.dibujar_marco_invernadero(self.lienzo_animacion_planta)
-            self.dibujar_planta()
+            self._programar_dibujo_planta()
 
 
     def crear_controles_generales(self, marco_padre):
-        marco_padre.grid_columnconfigure(0, weight=1)
-        marco_padre.grid_columnconfigure(1, weight=1)
-        marco_padre.grid_rowconfigure(0, weight=1)
-        marco_padre.grid_rowconfigure(1, weight=1)
-        marco_padre.grid_rowconfigure(2, weight=0)
+        self._configure_grid(marco_padre, rows=(1, 1, 0), cols=(1, 1))
 
         # Marco para controles de simulación de tiempo
         marco_controles_sim = ttk.LabelFrame(marco_padre, text="Control de Simulación", padding="5", style="TLabelframe")
@@ -685,8 +1340,7 @@ class AppInvernadero(tk.Tk):
         marco_control_bomba = ttk.LabelFrame(marco_padre, text="Control Bomba Agua", padding="5", style="TLabelframe")
         marco_control_bomba.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
 
-        marco_control_bomba.grid_columnconfigure(0, weight=1)
-        marco_control_bomba.grid_columnconfigure(1, weight=1)
+        self._configure_grid(marco_control_bomba, cols=(1, 1))
 
         self.boton_bomba_on = ttk.Button(marco_control_bomba, text="Bomba ON", command=lambda: self.controlar_bomba("ON"), style="TButton")
         self.boton_bomba_on.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
@@ -706,24 +1360,12 @@ class AppInvernadero(tk.Tk):
 
         # INICIO DE MODIFICACIÓN: DIBUJAR IMAGEN EN CONTROLES GENERALES
         if self.img_control_general:
-            img_width = self.img_control_general.width()
-            img_height = self.img_control_general.height()
-
             canvas_width = self.canvas_controles_imagenes.winfo_width()
             canvas_height = self.canvas_controles_imagenes.winfo_height()
 
             if canvas_width > 1 and canvas_height > 1:
-                ratio_w = canvas_width / img_width
-                ratio_h = canvas_height / img_height
-                scale_factor = min(ratio_w, ratio_h)
-
-                new_width = int(img_width * scale_factor)
-                new_height = int(img_height * scale_factor)
-
                 try:
-                    original_image = Image.open("icono_control.png")
-                    resized_image = original_image.resize((new_width, new_height), Image.LANCZOS)
-                    self.img_control_general_resized = ImageTk.PhotoImage(resized_image)
+                    self.img_control_general_resized = self._imagen_redimensionada("icono_control.png", canvas_width, canvas_height)
                     self.canvas_controles_imagenes.create_image(
                         canvas_width / 2, canvas_height / 2,
                         image=self.img_control_general_resized,
@@ -740,15 +1382,49 @@ class AppInvernadero(tk.Tk):
                     )
             else:
                  self.canvas_controles_imagenes.create_image(
-                    self.canvas_controles_imagenes.winfo_width()/2,
-                    self.canvas_controles_imagenes.winfo_height()/2,
+                    canvas_width / 2, canvas_height / 2,
                     image=self.img_control_general,
                     anchor="center",
                     tags="control_image"
                 )
+            # El lienzo aún no está mapeado (mide 1x1): se centra y escala al recibir su tamaño real
+            self._vincular_imagen_lienzo(self.canvas_controles_imagenes, self.img_control_general, "control_image", "icono_control.png")
         # FIN DE MODIFICACIÓN
 
 
+    def _vincular_rueda_raton(self, canvas):
+        """Activa la rueda del ratón para `canvas` solo mientras el puntero está encima.
+
+        Con un bind_all permanente, el último panel creado se quedaba con la rueda de
+        toda la aplicación y cada evento ejecutaba su callback aunque no tocara.
+        """
+        def al_girar(e):
+            canvas.yview_scroll(int(-1*(e.delta/120)), "units")
+
+        def al_salir(e):
+            # Pasar a un widget hijo también genera <Leave>; solo se suelta al salir de verdad
+            ruta = str(canvas)
+            debajo = canvas.winfo_containing(e.x_root, e.y_root)
+            if debajo is None or not (str(debajo) == ruta or str(debajo).startswith(ruta + ".")):
+                canvas.unbind_all("<MouseWheel>")
+
+        canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", al_girar))
+        canvas.bind("<Leave>", al_salir)
+
+    @contextlib.contextmanager
+    def _suspend_scrollregion(self, canvas, inner_frame):
+        """
+        Construye el contenido de un panel desplazable sin recalcular la scrollregion por
+        cada widget: el <Configure> del marco interior se conecta al terminar y la región
+        se fija una sola vez.
+        """
+        inner_frame.unbind("<Configure>")
+        try:
+            yield inner_frame
+        finally:
+            inner_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+            canvas.configure(scrollregion=canvas.bbox("all"))
+
     def crear_widgets_pc_temp(self, marco_padre):
         # INICIO DE MODIFICACIÓN PARA AGREGAR SCROLLBAR A "Control Manual de Sensores"
         canvas = tk.Canvas(marco_padre, bg="#333333", highlightthickness=0)
@@ -761,39 +1437,39 @@ class AppInvernadero(tk.Tk):
         inner_frame = ttk.Frame(canvas, style="TFrame")
         canvas.create_window((0, 0), window=inner_frame, anchor="nw", tags="inner_frame_pc_temp")
 
-        inner_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.bind_all("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
+        self._vincular_rueda_raton(canvas)
         # FIN DE MODIFICACIÓN
 
-        inner_frame.grid_columnconfigure(2, weight=1)
-
-        ttk.Label(inner_frame, text="Humedad:", style="TLabel").grid(row=0, column=1, sticky="w", padx=5, pady=2)
-        self.deslizador_humedad_aire = ttk.Scale(inner_frame, from_=0, to=100, orient="horizontal", command=self.actualizar_lecturas_ambiente_desde_deslizadores, style="TScale")
-        self.deslizador_humedad_aire.set(60)
-        self.deslizador_humedad_aire.grid(row=0, column=2, sticky="ew", padx=5, pady=2)
-        self.etiqueta_valor_humedad_aire = ttk.Label(inner_frame, text="60.0%", style="TLabel")
-        self.etiqueta_valor_humedad_aire.grid(row=0, column=3, sticky="w", padx=5)
-
-        ttk.Label(inner_frame, text="Temp (°C):", style="TLabel").grid(row=1, column=1, sticky="w", padx=5, pady=2)
-        self.deslizador_temp = ttk.Scale(inner_frame, from_=0, to=50, orient="horizontal", command=self.actualizar_lecturas_ambiente_desde_deslizadores, style="TScale")
-        self.deslizador_temp.set(25)
-        self.deslizador_temp.grid(row=1, column=2, sticky="ew", padx=5, pady=2)
-        self.etiqueta_valor_temp = ttk.Label(inner_frame, text="25.0°C", style="TLabel")
-        self.etiqueta_valor_temp.grid(row=1, column=3, sticky="w", padx=5)
-
-        ttk.Label(inner_frame, text="Luz:", style="TLabel").grid(row=2, column=1, sticky="w", padx=5, pady=2)
-        self.deslizador_luz = ttk.Scale(inner_frame, from_=0, to=1023, orient="horizontal", command=self.actualizar_lecturas_ambiente_desde_deslizadores, style="TScale")
-        self.deslizador_luz.set(500)
-        self.deslizador_luz.grid(row=2, column=2, sticky="ew", padx=5, pady=2)
-        self.etiqueta_valor_luz = ttk.Label(inner_frame, text="500", style="TLabel")
-        self.etiqueta_valor_luz.grid(row=2, column=3, sticky="w", padx=5)
-
-        ttk.Label(inner_frame, text="Suelo:", style="TLabel").grid(row=3, column=1, sticky="w", pady=2, padx=5)
-        self.deslizador_humedad_suelo = ttk.Scale(inner_frame, from_=0, to=1023, orient="horizontal", command=self.actualizar_lecturas_ambiente_desde_deslizadores, style="TScale")
-        self.deslizador_humedad_suelo.set(500)
-        self.deslizador_humedad_suelo.grid(row=3, column=2, sticky="ew", padx=5, pady=2)
-        self.etiqueta_valor_humedad_suelo = ttk.Label(inner_frame, text="500", style="TLabel")
-        self.etiqueta_valor_humedad_suelo.grid(row=3, column=3, sticky="w", padx=5)
+        with self._suspend_scrollregion(canvas, inner_frame):
+            inner_frame.grid_columnconfigure(2, weight=1)
+
+            ttk.Label(inner_frame, text="Humedad:", style="TLabel").grid(row=0, column=1, sticky="w", padx=5, pady=2)
+            self.deslizador_humedad_aire = ttk.Scale(inner_frame, from_=0, to=100, orient="horizontal", command=self._programar_actualizacion_deslizadores, style="TScale")
+            self.deslizador_humedad_aire.set(60)
+            self.deslizador_humedad_aire.grid(row=0, column=2, sticky="ew", padx=5, pady=2)
+            self.etiqueta_valor_humedad_aire = ttk.Label(inner_frame, text="60.0%", style="TLabel")
+            self.etiqueta_valor_humedad_aire.grid(row=0, column=3, sticky="w", padx=5)
+
+            ttk.Label(inner_frame, text="Temp (°C):", style="TLabel").grid(row=1, column=1, sticky="w", padx=5, pady=2)
+            self.deslizador_temp = ttk.Scale(inner_frame, from_=0, to=50, orient="horizontal", command=self._programar_actualizacion_deslizadores, style="TScale")
+            self.deslizador_temp.set(25)
+            self.deslizador_temp.grid(row=1, column=2, sticky="ew", padx=5, pady=2)
+            self.etiqueta_valor_temp = ttk.Label(inner_frame, text="25.0°C", style="TLabel")
+            self.etiqueta_valor_temp.grid(row=1, column=3, sticky="w", padx=5)
+
+            ttk.Label(inner_frame, text="Luz:", style="TLabel").grid(row=2, column=1, sticky="w", padx=5, pady=2)
+            self.deslizador_luz = ttk.Scale(inner_frame, from_=0, to=1023, orient="horizontal", command=self._programar_actualizacion_deslizadores, style="TScale")
+            self.deslizador_luz.set(500)
+            self.deslizador_luz.grid(row=2, column=2, sticky="ew", padx=5, pady=2)
+            self.etiqueta_valor_luz = ttk.Label(inner_frame, text="500", style="TLabel")
+            self.etiqueta_valor_luz.grid(row=2, column=3, sticky="w", padx=5)
+
+            ttk.Label(inner_frame, text="Suelo:", style="TLabel").grid(row=3, column=1, sticky="w", pady=2, padx=5)
+            self.deslizador_humedad_suelo = ttk.Scale(inner_frame, from_=0, to=1023, orient="horizontal", command=self._programar_actualizacion_deslizadores, style="TScale")
+            self.deslizador_humedad_suelo.set(500)
+            self.deslizador_humedad_suelo.grid(row=3, column=2, sticky="ew", padx=5, pady=2)
+            self.etiqueta_valor_humedad_suelo = ttk.Label(inner_frame, text="500", style="TLabel")
+            self.etiqueta_valor_humedad_suelo.grid(row=3, column=3, sticky="w", padx=5)
 
 
     def dibujar_icono_planta_pequena(self, lienzo):
@@ -810,28 +1486,57 @@ class AppInvernadero(tk.Tk):
     def crear_widgets_grafico_agua(self, marco_padre):
         self.lienzo_grafico = tk.Canvas(marco_padre, bg="#263238", highlightthickness=0)
         self.lienzo_grafico.pack(expand=True, fill="both", padx=5, pady=5)
-        self.lienzo_grafico.bind("<Configure>", lambda event: self.dibujar_grafico_agua())
+        self.lienzo_grafico.bind("<Configure>", lambda event: self._programar_redibujo("grafico_agua", self.dibujar_grafico_agua))
 
 
+    def _crear_items_grafico_agua(self, lienzo, lienzo_ancho, lienzo_alto):
+        margen_inferior = 20
+        margen_superior = 10
+        area_dibujo_alto = lienzo_alto - margen_inferior - margen_superior
+        items = {}
+        items["sin_datos"] = lienzo.create_text(lienzo_ancho/2, lienzo_alto/2, text="Sin datos de agua", fill="white", font=self._font_med)
+
+        # Reserva fija de barras y etiquetas (una por punto del historial); las sobrantes quedan ocultas
+        con_etiquetas = self.max_historial_agua <= MAX_ETIQUETAS_BARRAS
+        items["barras"] = [
+            (lienzo.create_rectangle(0, 0, 0, 0, fill="#00BCD4", outline="#0097A7", tags="barra", state="hidden"),
+             lienzo.create_text(0, 0, text="", fill="white", font=self._font_small, tags="barra", state="hidden") if con_etiquetas else None)
+            for _ in range(self.max_historial_agua)
+        ]
+        # (valor, num_barras) que muestra cada hueco; None = oculto
+        items["dibujado"] = [None] * self.max_historial_agua
+
+        # Línea de referencia fija (solo depende del tamaño del lienzo)
+        valor_linea = 10
+        linea_y = lienzo_alto - margen_inferior - ((valor_linea / 100) * area_dibujo_alto)
+        lienzo.create_line(5, linea_y, lienzo_ancho - 5, linea_y, fill="white", dash=(2,2), tags="umbral")
+        lienzo.create_text(lienzo_ancho - 15, linea_y - 5, text=str(valor_linea), fill="white", font=self._font_small, tags="umbral")
+        return items
+
     def dibujar_grafico_agua(self, evento=None):
         lienzo = self.lienzo_grafico
         if not lienzo or not lienzo.winfo_exists():
             return
 
-        lienzo.delete("all")
         lienzo_ancho = lienzo.winfo_width()
         lienzo_alto = lienzo.winfo_height()
 
         if lienzo_ancho < 10 or lienzo_alto < 10:
             return
 
+        items = self._items_lienzo_para_tamano("grafico_agua", lienzo, lienzo_ancho, lienzo_alto, self._crear_items_grafico_agua)
+
         datos = self.historial_agua
         if not datos:
-            lienzo.create_text(lienzo_ancho/2, lienzo_alto/2, text="Sin datos de agua", fill="white", font=("Arial", 10))
+            lienzo.itemconfigure("barra", state="hidden")
+            items["dibujado"] = [None] * len(items["barras"])
+            lienzo.itemconfigure(items["sin_datos"], state="normal")
+            lienzo.itemconfigure("umbral", state="hidden")
             return
+        lienzo.itemconfigure(items["sin_datos"], state="hidden")
+        lienzo.itemconfigure("umbral", state="normal")
 
         num_barras = len(datos)
-        if num_barras == 0: return
 
         margen_inferior = 20
         margen_superior = 10
@@ -842,7 +1547,20 @@ class AppInvernadero(tk.Tk):
 
         valor_max_dibujo = 100
 
-        for i, valor in enumerate(datos):
+        dibujado = items["dibujado"]
+        for i, (barra, texto) in enumerate(items["barras"]):
+            if i >= num_barras:
+                if dibujado[i] is not None:
+                    lienzo.itemconfigure(barra, state="hidden")
+                    if texto is not None:
+                        lienzo.itemconfigure(texto, state="hidden")
+                    dibujado[i] = None
+                continue
+            valor = datos[i]
+            # Con el tanque estable el historial se repite: no hay nada que mover en este hueco
+            if dibujado[i] == (valor, num_barras):
+                continue
+            dibujado[i] = (valor, num_barras)
             barra_x1 = (espacio_por_barra * i) + (espacio_por_barra * 0.15)
             barra_x2 = barra_x1 + ancho_barra_real
 
@@ -850,20 +1568,14 @@ class AppInvernadero(tk.Tk):
             barra_y1 = lienzo_alto - margen_inferior - altura_barra
             barra_y2 = lienzo_alto - margen_inferior
 
-            lienzo.create_rectangle(barra_x1, barra_y1, barra_x2, barra_y2, fill="#00BCD4", outline="#0097A7", tags="barra")
-            lienzo.create_text(barra_x1 + (barra_x2 - barra_x1) / 2, barra_y1 - 5, text=str(valor), fill="white", font=("Arial", 8))
-
-        valor_linea = 10
-        if valor_linea <= valor_max_dibujo:
-            linea_y = lienzo_alto - margen_inferior - ((valor_linea / valor_max_dibujo) * area_dibujo_alto)
-            lienzo.create_line(5, linea_y, lienzo_ancho - 5, linea_y, fill="white", dash=(2,2))
-            lienzo.create_text(lienzo_ancho - 15, linea_y - 5, text=str(valor_linea), fill="white", font=("Arial", 8))
+            lienzo.coords(barra, barra_x1, barra_y1, barra_x2, barra_y2)
+            lienzo.itemconfigure(barra, state="normal")
+            if texto is not None:
+                lienzo.coords(texto, barra_x1 + (barra_x2 - barra_x1) / 2, barra_y1 - 5)
+                lienzo.itemconfigure(texto, text=str(valor), state="normal")
 
     def crear_widgets_notificacion(self, marco_padre):
-        marco_padre.grid_rowconfigure(0, weight=1)
-        marco_padre.grid_rowconfigure(1, weight=0)
-        marco_padre.grid_rowconfigure(2, weight=0)
-        marco_padre.grid_rowconfigure(3, weight=0)
+        self._configure_grid(marco_padre, rows=(1, 0, 0, 0))
 
         self.etiqueta_notificacion = ttk.Label(marco_padre, text="Estado: Todo bien en el invernadero.", style="TLabel", wraplength=200, justify="left")
         self.etiqueta_notificacion.pack(expand=True, fill="both", padx=5, pady=5)
@@ -875,13 +1587,17 @@ class AppInvernadero(tk.Tk):
         self.canvas_notificaciones_imagenes.pack(padx=5, pady=5, fill="x")
 
         if self.img_notificacion:
+            # Aquí el lienzo todavía no está mapeado y winfo_width() devolvería 1;
+            # la imagen se centra con el tamaño que trae cada evento <Configure>
             self.canvas_notificaciones_imagenes.create_image(
-                self.canvas_notificaciones_imagenes.winfo_width()/2,
-                self.canvas_notificaciones_imagenes.winfo_height()/2,
+                0, 0,
                 image=self.img_notificacion,
                 anchor="center",
                 tags="notification_image"
             )
+            self.canvas_notificaciones_imagenes.bind("<Configure>",
+                lambda event: event.widget.coords("notification_image", event.width / 2, event.height / 2)
+            )
 
         marco_noti = ttk.Frame(marco_padre, style="TFrame")
         marco_noti.pack(padx=5, pady=5, fill="x")
@@ -897,16 +1613,24 @@ class AppInvernadero(tk.Tk):
         ttk.Label(marco_padre, text="Songp", style="TLabel").pack(pady=5)
 
     def dibujar_pokeball(self, lienzo, color):
+        """Dibuja la pokéball completa y devuelve el id del círculo cuyo color indica el estado."""
         lienzo.delete("all")
-        lienzo.create_oval(5, 5, 35, 35, fill=color, outline="black", width=2)
+        circulo = lienzo.create_oval(5, 5, 35, 35, fill=color, outline="black", width=2)
         lienzo.create_rectangle(5, 18, 35, 22, fill="black", outline="black")
         lienzo.create_oval(15, 15, 25, 25, fill="white", outline="black", width=1)
         lienzo.create_oval(18, 18, 22, 22, fill="black", outline="black", width=1)
+        return circulo
 
     def dibujar_indicador_alerta_led(self):
         """Dibuja el indicador del LED de alerta basado en self.alerta_led_activo."""
         color = "red" if self.alerta_led_activo else "#4CAF50"
-        self.dibujar_pokeball(self.lienzo_estado_alerta_led, color)
+        lienzo = self.lienzo_estado_alerta_led
+        # El lienzo es de tamaño fijo: la pokéball se dibuja una vez y luego solo cambia el color
+        items = self._items_lienzo_para_tamano("alerta_led", lienzo, 30, 30,
+                                               lambda lienzo, ancho, alto: {"circulo": self.dibujar_pokeball(lienzo, color), "color": color})
+        if items["color"] != color:
+            lienzo.itemconfigure(items["circulo"], fill=color)
+            items["color"] = color
 
 
     def crear_widgets_nivel_notificador(self, marco_padre):
@@ -921,29 +1645,28 @@ class AppInvernadero(tk.Tk):
         inner_frame = ttk.Frame(canvas, style="TFrame")
         canvas.create_window((0, 0), window=inner_frame, anchor="nw", tags="inner_frame_emergencia")
 
-        inner_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.bind_all("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
+        self._vincular_rueda_raton(canvas)
         # FIN DE MODIFICACIÓN
 
-        inner_frame.grid_rowconfigure(0, weight=1)
+        with self._suspend_scrollregion(canvas, inner_frame):
+            inner_frame.grid_rowconfigure(0, weight=1)
 
-        marco_control_led = ttk.LabelFrame(inner_frame, text="Control LED Alerta", padding="5", style="TLabelframe")
-        marco_control_led.pack(pady=5, fill="both", expand=True, padx=5)
+            marco_control_led = ttk.LabelFrame(inner_frame, text="Control LED Alerta", padding="5", style="TLabelframe")
+            marco_control_led.pack(pady=5, fill="both", expand=True, padx=5)
 
-        marco_control_led.grid_columnconfigure(0, weight=1)
-        marco_control_led.grid_columnconfigure(1, weight=1)
+            self._configure_grid(marco_control_led, cols=(1, 1))
 
-        self.boton_led_encender = ttk.Button(marco_control_led, text="LED ON", command=lambda: self.alternar_luz_led("ON"), style="TButton")
-        self.boton_led_encender.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+            self.boton_led_encender = ttk.Button(marco_control_led, text="LED ON", command=lambda: self.alternar_luz_led("ON"), style="TButton")
+            self.boton_led_encender.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
 
-        self.boton_led_apagar = ttk.Button(marco_control_led, text="LED OFF", command=lambda: self.alternar_luz_led("OFF"), style="TButton")
-        self.boton_led_apagar.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+            self.boton_led_apagar = ttk.Button(marco_control_led, text="LED OFF", command=lambda: self.alternar_luz_led("OFF"), style="TButton")
+            self.boton_led_apagar.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
 
-        self.boton_config_wifi = ttk.Button(inner_frame, text="Configurar WiFi ESP32 (MQTT)", command=self.enviar_credenciales_wifi, style="TButton")
-        self.boton_config_wifi.pack(pady=10, fill="x", padx=5)
+            self.boton_config_wifi = ttk.Button(inner_frame, text="Configurar WiFi ESP32 (MQTT)", command=self.enviar_credenciales_wifi, style="TButton")
+            self.boton_config_wifi.pack(pady=10, fill="x", padx=5)
 
-        self.boton_config_wifi_http = ttk.Button(inner_frame, text="Configurar WiFi ESP32 (HTTP)", command=self.enviar_credenciales_wifi_http, style="TButton")
-        self.boton_config_wifi_http.pack(pady=5, fill="x", padx=5)
+            self.boton_config_wifi_http = ttk.Button(inner_frame, text="Configurar WiFi ESP32 (HTTP)", command=self.enviar_credenciales_wifi_http, style="TButton")
+            self.boton_config_wifi_http.pack(pady=5, fill="x", padx=5)
 
 
     def crear_widgets_lecturas_sensores_bottom(self, marco_padre):
@@ -951,11 +1674,7 @@ class AppInvernadero(tk.Tk):
         Nuevo método para crear el panel de Lecturas Actuales de Sensores
         en la parte inferior derecha.
         """
-        marco_padre.grid_rowconfigure(0, weight=1)
-        marco_padre.grid_rowconfigure(1, weight=1)
-        marco_padre.grid_rowconfigure(2, weight=1)
-        marco_padre.grid_rowconfigure(3, weight=1)
-        marco_padre.grid_rowconfigure(4, weight=0)
+        self._configure_grid(marco_padre, rows=(1, 1, 1, 1, 0))
 
         self.etiqueta_sens_temp = ttk.Label(marco_padre, text="Temp: N/A", style="TLabel")
         self.etiqueta_sens_temp.pack(anchor="w", padx=5, pady=2, fill="x")
@@ -973,10 +1692,7 @@ class AppInvernadero(tk.Tk):
         self.canvas_sensores_imagenes.pack(padx=5, pady=5, fill="x", side="bottom")
 
         if self.img_temp_sensor:
-            self.canvas_sensores_imagenes.bind("<Configure>",
-                lambda event, img=self.img_temp_sensor, tag="sensor_image_temp", filename="temp.png":
-                    self.redimensionar_y_dibujar_imagen(event, img, tag, filename)
-            )
+            self._vincular_imagen_lienzo(self.canvas_sensores_imagenes, self.img_temp_sensor, "sensor_image_temp", "temp.png")
             self.canvas_sensores_imagenes.create_image(
                 self.canvas_sensores_imagenes.winfo_width()/2,
                 self.canvas_sensores_imagenes.winfo_height()/2,
@@ -1015,10 +1731,7 @@ class AppInvernadero(tk.Tk):
         self.canvas_info_planta_imagenes.grid(row=row_idx, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
 
         if self.img_coronaplanta:
-            self.canvas_info_planta_imagenes.bind("<Configure>",
-                lambda event, img=self.img_coronaplanta, tag="info_planta_image", filename="coronaplanta.png":
-                    self.redimensionar_y_dibujar_imagen(event, img, tag, filename)
-            )
+            self._vincular_imagen_lienzo(self.canvas_info_planta_imagenes, self.img_coronaplanta, "info_planta_image", "coronaplanta.png")
             self.canvas_info_planta_imagenes.create_image(
                 self.canvas_info_planta_imagenes.winfo_width()/2,
                 self.canvas_info_planta_imagenes.winfo_height()/2,
@@ -1027,35 +1740,69 @@ class AppInvernadero(tk.Tk):
                 tags="info_planta_image"
             )
 
-    def redimensionar_y_dibujar_imagen(self, event, tk_image, tag, filename):
+    def _tamano_redimensionado(self, filename, canvas_width, canvas_height):
+        """Tamaño de `filename` escalado (manteniendo la proporción) para caber en el lienzo."""
+        img_width, img_height = self._pil_originals[filename].size
+        scale_factor = min(canvas_width / img_width, canvas_height / img_height)
+        return (max(1, int(img_width * scale_factor)), max(1, int(img_height * scale_factor)))
+
+    def _imagen_redimensionada(self, filename, canvas_width, canvas_height, resample=Image.LANCZOS):
         """
-        Redimensiona una imagen y la dibuja en un canvas.
+        Devuelve un PhotoImage de `filename` escalado (manteniendo la proporción) para caber en el lienzo.
+        El PNG no se vuelve a leer de disco y cada tamaño y filtro solo se redimensiona una vez.
+        """
+        new_size = self._tamano_redimensionado(filename, canvas_width, canvas_height)
+
+        clave = (filename, *new_size, resample)
+        imagen = self._resized_cache.get(clave)
+        if imagen is None:
+            if len(self._resized_cache) >= MAX_IMAGENES_REDIMENSIONADAS:
+                self._resized_cache.pop(next(iter(self._resized_cache))) # Descartar la más antigua
+            imagen = ImageTk.PhotoImage(self._pil_originals[filename].resize(new_size, resample))
+            self._resized_cache[clave] = imagen
+        return imagen
+
+    def _vincular_imagen_lienzo(self, canvas, tk_image, tag, filename):
+        """
+        Guarda en el propio lienzo qué imagen muestra y conecta su <Configure> al método
+        _al_configurar_imagen (un único método ligado, sin un lambda por lienzo).
         tk_image: la ImageTk.PhotoImage original (no la PIL.Image)
         tag: la etiqueta para el elemento del canvas
-        filename: el nombre del archivo original para reabrirlo con PIL
+        filename: el nombre del archivo original (clave en self._pil_originals)
+        """
+        canvas._image_original = tk_image
+        canvas._image_tag = tag
+        canvas._image_filename = filename
+        canvas.bind("<Configure>", self._al_configurar_imagen)
+
+    def _al_configurar_imagen(self, event):
+        self._programar_redibujo(event.widget._image_tag, lambda: self.redimensionar_y_dibujar_imagen(event))
+
+    def redimensionar_y_dibujar_imagen(self, event, definitiva=False):
+        """
+        Redimensiona una imagen y la dibuja en un canvas preparado con _vincular_imagen_lienzo.
+        definitiva: si es False se dibuja primero con BILINEAR (rápido) y se programa
+                    el redimensionado con LANCZOS para cuando el tamaño deje de cambiar
         """
         canvas = event.widget
+        tk_image, tag, filename = canvas._image_original, canvas._image_tag, canvas._image_filename
         canvas.delete(tag)
 
-        canvas_width = canvas.winfo_width()
-        canvas_height = canvas.winfo_height()
+        # El evento <Configure> ya trae el tamaño; no hace falta preguntarle a Tk
+        canvas_width = event.width
+        canvas_height = event.height
 
         if canvas_width < 1 or canvas_height < 1:
             return
 
         try:
-            original_image = Image.open(filename)
-            img_width, img_height = original_image.size
-
-            ratio_w = canvas_width / img_width
-            ratio_h = canvas_height / img_height
-            scale_factor = min(ratio_w, ratio_h)
+            # Si este tamaño ya se redimensionó con LANCZOS, no hace falta la pasada rápida
+            if not definitiva and (filename, *self._tamano_redimensionado(filename, canvas_width, canvas_height), Image.LANCZOS) in self._resized_cache:
+                definitiva = True
+            resample = Image.LANCZOS if definitiva else Image.BILINEAR
 
-            new_width = int(img_width * scale_factor)
-            new_height = int(img_height * scale_factor)
-
-            resized_image = original_image.resize((new_width, new_height), Image.LANCZOS)
-            setattr(canvas, f"_resized_image_{tag}", ImageTk.PhotoImage(resized_image))
+            # Mantener una referencia a la imagen mostrada aunque salga de la caché
+            setattr(canvas, f"_resized_image_{tag}", self._imagen_redimensionada(filename, canvas_width, canvas_height, resample))
 
             canvas.create_image(
                 canvas_width / 2, canvas_height / 2,
@@ -1063,6 +1810,8 @@ class AppInvernadero(tk.Tk):
                 anchor="center",
                 tags=tag
             )
+            if not definitiva:
+                self._programar_redibujo(("lanczos", tag), lambda: self.redimensionar_y_dibujar_imagen(event, definitiva=True), 150)
         except Exception as e:
             print(f"Error al redimensionar y dibujar {filename}: {e}")
             canvas.create_image(
@@ -1076,84 +1825,175 @@ class AppInvernadero(tk.Tk):
     def crear_widgets_grafico_altura(self, marco_padre):
         self.lienzo_grafico_altura = tk.Canvas(marco_padre, bg="#263238", highlightthickness=0)
         self.lienzo_grafico_altura.pack(expand=True, fill="both", padx=5, pady=5)
-        self.lienzo_grafico_altura.bind("<Configure>", lambda event: self.dibujar_grafico_altura())
+        self.lienzo_grafico_altura.bind("<Configure>", lambda event: self._programar_redibujo("grafico_altura", self.dibujar_grafico_altura))
+
+    def _crear_items_grafico_altura(self, lienzo, lienzo_ancho, lienzo_alto):
+        margen_x = 40
+        margen_y = 30
+
+        area_dibujo_ancho = lienzo_ancho - 2 * margen_x
+        area_dibujo_alto = lienzo_alto - 2 * margen_y
+        base_y = margen_y + area_dibujo_alto
+
+        lienzo.create_line(margen_x, base_y, margen_x + area_dibujo_ancho, base_y, fill="white", width=1)
+        lienzo.create_line(margen_x, base_y, margen_x, margen_y, fill="white", width=1)
+
+        lienzo.create_text(margen_x + area_dibujo_ancho / 2, lienzo_alto - margen_y / 2, text="Tiempo (Días)", fill="white", font=self._font_axis)
+        lienzo.create_text(margen_x / 2, margen_y + area_dibujo_alto / 2, text="Altura (cm)", fill="white", font=self._font_axis, angle=90)
+
+        items = {}
+        # Una sola polilínea persistente; sus puntos se sustituyen con coords()
+        items["linea"] = lienzo.create_line(0, 0, 0, 0, fill="#4CAF50", width=2, tags="linea_altura", state="hidden")
+        items["ultimo_punto"] = lienzo.create_oval(0, 0, 0, 0, fill="#FFC107", outline="white", state="hidden")
+        items["ultimo_texto"] = lienzo.create_text(0, 0, text="", fill="white", font=self._font_small, state="hidden")
+
+        # Las marcas de los ejes están siempre en la misma posición; solo cambia su texto
+        num_marcas = 5
+        items["marcas_y"] = []
+        items["marcas_x"] = []
+        for i in range(num_marcas + 1):
+            y_pos = base_y - (i / num_marcas) * area_dibujo_alto
+            lienzo.create_line(margen_x - 5, y_pos, margen_x, y_pos, fill="white", tags="marcas", state="hidden")
+            items["marcas_y"].append(lienzo.create_text(margen_x - 10, y_pos, text="", anchor="e", fill="white", font=self._font_small, tags="marcas", state="hidden"))
+
+            x_pos = margen_x + (i / num_marcas) * area_dibujo_ancho
+            lienzo.create_line(x_pos, base_y, x_pos, base_y + 5, fill="white", tags="marcas", state="hidden")
+            items["marcas_x"].append(lienzo.create_text(x_pos, base_y + 15, text="", anchor="n", fill="white", font=self._font_small, tags="marcas", state="hidden"))
+        # Textos de las marcas y visibilidad de la línea ya aplicados (None = ocultos)
+        items["textos_marcas"] = None
+        items["estado_linea"] = "hidden"
+        return items
 
     def dibujar_grafico_altura(self):
         lienzo = self.lienzo_grafico_altura
         if not lienzo or not lienzo.winfo_exists():
             return
 
-        lienzo.delete("all")
         lienzo_ancho = lienzo.winfo_width()
         lienzo_alto = lienzo.winfo_height()
 
         if lienzo_ancho < 50 or lienzo_alto < 50: return
 
+        items = self._items_lienzo_para_tamano("grafico_altura", lienzo, lienzo_ancho, lienzo_alto, self._crear_items_grafico_altura)
+
         margen_x = 40
         margen_y = 30
 
         area_dibujo_ancho = lienzo_ancho - 2 * margen_x
         area_dibujo_alto = lienzo_alto - 2 * margen_y
 
-        lienzo.create_line(margen_x, margen_y + area_dibujo_alto, margen_x + area_dibujo_ancho, margen_y + area_dibujo_alto, fill="white", width=1)
-        lienzo.create_line(margen_x, margen_y + area_dibujo_alto, margen_x, margen_y, fill="white", width=1)
-
-        lienzo.create_text(margen_x + area_dibujo_ancho / 2, lienzo_alto - margen_y / 2, text="Tiempo (Días)", fill="white", font=("Arial", 9))
-        lienzo.create_text(margen_x / 2, margen_y + area_dibujo_alto / 2, text="Altura (cm)", fill="white", font=("Arial", 9), angle=90)
-
         if not self.historial_altura:
+            if items["textos_marcas"] is not None:
+                lienzo.itemconfigure("marcas", state="hidden")
+                items["textos_marcas"] = None
+            self._estado_linea_altura(lienzo, items, "hidden")
             return
 
-        max_altura = max(self.historial_altura) if self.historial_altura else self.planta.altura_maxima_cm
-        max_tiempo = max(self.historial_tiempo_dias) if self.historial_tiempo_dias else 1
+        max_altura = self._max_altura_cached
+        # La edad solo crece, así que el último punto es el más alejado del origen
+        max_tiempo = self.historial_tiempo_dias[-1] - self._tiempo_origen_grafico
 
         max_altura_escala = max(max_altura, self.planta.altura_maxima_cm * 0.2)
         if max_altura_escala == 0: max_altura_escala = 1
 
         if max_tiempo == 0: max_tiempo = 1
 
-        puntos_grafico = []
-        for i in range(len(self.historial_altura)):
-            x = margen_x + (self.historial_tiempo_dias[i] / max_tiempo) * area_dibujo_ancho
-            y = (margen_y + area_dibujo_alto) - (self.historial_altura[i] / max_altura_escala) * area_dibujo_alto
-            puntos_grafico.append((x, y))
-
-        if len(puntos_grafico) > 1:
-            lienzo.create_line(puntos_grafico, fill="#4CAF50", width=2, tags="linea_altura")
-
-            ultimo_x, ultimo_y = puntos_grafico[-1]
-            lienzo.create_oval(ultimo_x - 3, ultimo_y - 3, ultimo_x + 3, ultimo_y + 3, fill="#FFC107", outline="white")
-            lienzo.create_text(ultimo_x, ultimo_y - 10, text=f"{self.historial_altura[-1]:.1f} cm", fill="white", font=("Arial", 8))
-
-        num_marcas_y = 5
-        for i in range(num_marcas_y + 1):
-            altura_valor = (i / num_marcas_y) * max_altura_escala
-            y_pos = (margen_y + area_dibujo_alto) - (altura_valor / max_altura_escala) * area_dibujo_alto
-            lienzo.create_line(margen_x - 5, y_pos, margen_x, y_pos, fill="white")
-            lienzo.create_text(margen_x - 10, y_pos, text=f"{altura_valor:.0f}", anchor="e", fill="white", font=("Arial", 8))
-
-        num_marcas_x = 5
-        if max_tiempo > 0:
-            for i in range(num_marcas_x + 1):
-                tiempo_valor = (i / num_marcas_x) * max_tiempo
-                x_pos = margen_x + (tiempo_valor / max_tiempo) * area_dibujo_ancho
-                lienzo.create_line(x_pos, margen_y + area_dibujo_alto, x_pos, margen_y + area_dibujo_alto + 5, fill="white")
-                lienzo.create_text(x_pos, margen_y + area_dibujo_alto + 15, text=f"{tiempo_valor:.0f}", anchor="n", fill="white", font=("Arial", 8))
+        # Puntos [x0, y0, x1, y1, ...] listos para coords()
+        n_puntos = len(self.historial_altura)
+        puntos = calcular_puntos_grafico(
+            self.historial_tiempo_dias.valores(),
+            self.historial_altura.valores(), # Vista float32 sin copiar
+            self._tiempo_origen_grafico, margen_x, margen_y + area_dibujo_alto,
+            area_dibujo_ancho, area_dibujo_alto, max_tiempo, max_altura_escala)
+
+        if n_puntos > 1:
+            lienzo.coords(items["linea"], puntos.tolist())
+
+            ultimo_x, ultimo_y = float(puntos[-2]), float(puntos[-1])
+            lienzo.coords(items["ultimo_punto"], ultimo_x - 3, ultimo_y - 3, ultimo_x + 3, ultimo_y + 3)
+            lienzo.coords(items["ultimo_texto"], ultimo_x, ultimo_y - 10)
+            lienzo.itemconfigure(items["ultimo_texto"], text=f"{self.historial_altura[-1]:.1f} cm")
+            self._estado_linea_altura(lienzo, items, "normal")
+        else:
+            self._estado_linea_altura(lienzo, items, "hidden")
+
+        # Las etiquetas de los ejes solo se tocan cuando cambia su texto redondeado
+        num_marcas = len(items["marcas_y"]) - 1
+        textos = tuple(
+            (f"{(i / num_marcas) * max_altura_escala:.0f}", f"{(i / num_marcas) * max_tiempo:.0f}")
+            for i in range(num_marcas + 1)
+        )
+        if textos != items["textos_marcas"]:
+            anteriores = items["textos_marcas"]
+            for i, (texto_y, texto_x) in enumerate(textos):
+                if anteriores is None or anteriores[i][0] != texto_y:
+                    lienzo.itemconfigure(items["marcas_y"][i], text=texto_y)
+                if anteriores is None or anteriores[i][1] != texto_x:
+                    lienzo.itemconfigure(items["marcas_x"][i], text=texto_x)
+            if anteriores is None:
+                lienzo.itemconfigure("marcas", state="normal")
+            items["textos_marcas"] = textos
+
+    def _estado_linea_altura(self, lienzo, items, estado):
+        """Muestra u oculta la línea de altura y su último punto solo si cambia."""
+        if items["estado_linea"] != estado:
+            for clave in ("linea", "ultimo_punto", "ultimo_texto"):
+                lienzo.itemconfigure(items[clave], state=estado)
+            items["estado_linea"] = estado
+
+    def _programar_actualizacion_deslizadores(self, valor=None):
+        """
+        command= de los deslizadores: ttk.Scale lo invoca en cada píxel del arrastre.
+        Se aplica como mucho una actualización cada 50 ms, siempre con los valores más recientes.
+        """
+        if self._suppress_scale_cb or self._actualizacion_deslizadores_pendiente is not None:
+            return
+        self._actualizacion_deslizadores_pendiente = self.after(50, self._aplicar_actualizacion_deslizadores)
+
+    def _aplicar_actualizacion_deslizadores(self):
+        self._actualizacion_deslizadores_pendiente = None
+        self.actualizar_lecturas_ambiente_desde_deslizadores()
 
     def actualizar_lecturas_ambiente_desde_deslizadores(self, evento=None):
         """Actualiza las lecturas simuladas desde los deslizadores y las muestra.
         Estas lecturas serán sobrescritas por MQTT si el ESP32 está enviando datos.
         """
         global lecturas_actuales
+        if self._suppress_scale_cb:
+            return
         lecturas_actuales["temperatura"] = self.deslizador_temp.get()
         lecturas_actuales["humedad_aire"] = self.deslizador_humedad_aire.get()
         lecturas_actuales["luz"] = self.deslizador_luz.get()
         lecturas_actuales["humedad_suelo"] = self.deslizador_humedad_suelo.get()
 
-        self.etiqueta_valor_temp.config(text=f"{lecturas_actuales['temperatura']:.1f}°C")
-        self.etiqueta_valor_humedad_aire.config(text=f"{lecturas_actuales['humedad_aire']:.1f}%")
-        self.etiqueta_valor_luz.config(text=f"{lecturas_actuales['luz']:.0f}")
-        self.etiqueta_valor_humedad_suelo.config(text=f"{lecturas_actuales['humedad_suelo']:.0f}")
+        self._actualizar_etiqueta("valor_temp", text=f"{lecturas_actuales['temperatura']:.1f}°C")
+        self._actualizar_etiqueta("valor_humedad_aire", text=f"{lecturas_actuales['humedad_aire']:.1f}%")
+        self._actualizar_etiqueta("valor_luz", text=f"{lecturas_actuales['luz']:.0f}")
+        self._actualizar_etiqueta("valor_humedad_suelo", text=f"{lecturas_actuales['humedad_suelo']:.0f}")
+
+    def _enqueue_publish(self, topic, payload, qos=0):
+        """
+        Encola una publicación MQTT; las que lleguen en los próximos 50 ms salen en la misma pasada.
+        Los comandos de control (LED, bomba, riego) usan QoS 0 sin retain: no esperan PUBACK y el
+        siguiente comando o la sincronización periódica corrigen una pérdida. Las credenciales WiFi
+        van con QoS 1 (entrega al menos una vez), tampoco retenidas: el broker no debe guardarlas.
+        """
+        self._mqtt_outbox.append((topic, payload, qos))
+        if not self._mqtt_flush_scheduled:
+            self._mqtt_flush_scheduled = True
+            self.after(50, self._flush_mqtt)
+
+    def _flush_mqtt(self):
+        """Vacía la cola de publicaciones en una sola pasada (paho hace la escritura en su hilo de red)."""
+        self._mqtt_flush_scheduled = False
+        while self._mqtt_outbox:
+            topic, payload, qos = self._mqtt_outbox.popleft()
+            try:
+                info = self.cliente_mqtt_gui.publish(topic, payload, qos=qos, retain=False)
+                if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    log.warning("GUI MQTT: No se pudo publicar en %s (rc=%s)", topic, info.rc)
+            except Exception as e:
+                log.error("GUI MQTT: Error al publicar en %s: %s", topic, e)
 
     def alternar_luz_led(self, comando):
         """
@@ -1161,7 +2001,7 @@ class AppInvernadero(tk.Tk):
         comando: "ON" o "OFF"
         """
         topic = "invernadero/control_led_alerta"
-        self.cliente_mqtt_gui.publish(topic, comando)
+        self._enqueue_publish(topic, _PAYLOADS_COMANDO[comando])
         print(f"Comando LED enviado a ESP32: {comando}")
 
     def controlar_bomba(self, comando):
@@ -1170,7 +2010,7 @@ class AppInvernadero(tk.Tk):
         comando: "ON" o "OFF"
         """
         topic = "invernadero/control_bomba"
-        self.cliente_mqtt_gui.publish(topic, comando)
+        self._enqueue_publish(topic, _PAYLOADS_COMANDO[comando])
         print(f"Comando Bomba enviado a ESP32: {comando}")
 
     def toggle_riego_automatico_sensor(self):
@@ -1181,13 +2021,13 @@ class AppInvernadero(tk.Tk):
         # --- CAMBIO: Publicar el comando al ESP32 ---
         topic = "invernadero/control_riego_auto_sensor"
         if self.riego_automatico_activo:
+            self._enqueue_publish(topic, _PAYLOAD_ON)
             self.boton_riego_auto_sensor.config(text="Desactivar Riego Auto (Sensor)", style="TButton")
-            messagebox.showinfo("Riego Automático", "Riego automático por sensor ACTIVADO.")
-            self.cliente_mqtt_gui.publish(topic, "ON")
+            self.mostrar_aviso("Riego automático por sensor ACTIVADO.")
         else:
+            self._enqueue_publish(topic, _PAYLOAD_OFF)
             self.boton_riego_auto_sensor.config(text="Activar Riego Auto (Sensor)", style="TButton")
-            messagebox.showinfo("Riego Automático", "Riego automático por sensor DESACTIVADO.")
-            self.cliente_mqtt_gui.publish(topic, "OFF")
+            self.mostrar_aviso("Riego automático por sensor DESACTIVADO.")
         # --- FIN CAMBIO ---
 
 
@@ -1202,11 +2042,11 @@ class AppInvernadero(tk.Tk):
 
         password = simpledialog.askstring("Configurar WiFi ESP32 (MQTT)", "Introduce la contraseña de la red WiFi (dejar vacío si no tiene):")
 
-        payload = json.dumps({"ssid": ssid, "password": password})
+        payload = volcar_json({"ssid": ssid, "password": password})
         topic = "invernadero/config/wifi"
 
         try:
-            self.cliente_mqtt_gui.publish(topic, payload)
+            self._enqueue_publish(topic, payload, qos=1)
             print(f"Enviando credenciales WiFi a ESP32 (MQTT): {payload}")
             messagebox.showinfo("Configuración WiFi", "Credenciales enviadas por MQTT. El ESP32 intentará conectar a la nueva red. Por favor, espera unos segundos y observa el estado del ESP32.")
             self.esp32_wifi_status = "Enviando credenciales (MQTT)..."
@@ -1236,28 +2076,43 @@ class AppInvernadero(tk.Tk):
         url = f"http://{esp32_ip}/savewifi"
         data = {"ssid": ssid, "password": password}
 
-        try:
-            response = requests.post(url, data=data, timeout=5)
-            if response.status_code == 200:
-                messagebox.showinfo("Configuración WiFi (HTTP)", "Credenciales enviadas por HTTP. El ESP32 debería reiniciarse y conectar a la nueva red.")
-                self.esp32_wifi_status = "Credenciales enviadas (HTTP). Reiniciando ESP32..."
-                self.actualizar_estado_wifi_esp32_gui()
-            else:
-                messagebox.showerror("Error HTTP", f"Fallo al enviar credenciales por HTTP. Código de estado: {response.status_code}\nRespuesta: {response.text}")
-                self.esp32_wifi_status = f"Fallo HTTP ({response.status_code})"
-                self.actualizar_estado_wifi_esp32_gui()
-        except requests.exceptions.ConnectionError:
-            messagebox.showerror("Error de Conexión", f"No se pudo conectar al ESP32 en {esp32_ip}. Asegúrate de que el ESP32 esté en modo AP y tu PC esté conectado a su red AP.")
-            self.esp32_wifi_status = "Error de conexión HTTP"
-            self.actualizar_estado_wifi_esp32_gui()
-        except requests.exceptions.Timeout:
-            messagebox.showerror("Tiempo de Espera Agotado", f"Tiempo de espera agotado al intentar conectar a {esp32_ip}. Asegúrate de que la IP sea correcta y el ESP32 esté activo.")
-            self.esp32_wifi_status = "Tiempo de espera HTTP agotado"
-            self.actualizar_estado_wifi_esp32_gui()
-        except Exception as e:
-            messagebox.showerror("Error Inesperado", f"Ocurrió un error inesperado: {e}")
-            self.esp32_wifi_status = f"Error HTTP inesperado: {e}"
-            self.actualizar_estado_wifi_esp32_gui()
+        self.esp32_wifi_status = "Enviando credenciales (HTTP)..."
+        self.actualizar_estado_wifi_esp32_gui()
+
+        def _do_post():
+            # Hilo de trabajo: sólo red, nada de Tk. El resultado vuelve al hilo de Tk con after().
+            try:
+                response = self._http.post(url, data=data, timeout=5)
+                if response.status_code == 200:
+                    result = ("info", "Configuración WiFi (HTTP)", "Credenciales enviadas por HTTP. El ESP32 debería reiniciarse y conectar a la nueva red.",
+                              "Credenciales enviadas (HTTP). Reiniciando ESP32...")
+                else:
+                    result = ("error", "Error HTTP", f"Fallo al enviar credenciales por HTTP. Código de estado: {response.status_code}\nRespuesta: {response.text}",
+                              f"Fallo HTTP ({response.status_code})")
+            except requests.exceptions.ConnectionError:
+                result = ("error", "Error de Conexión", f"No se pudo conectar al ESP32 en {esp32_ip}. Asegúrate de que el ESP32 esté en modo AP y tu PC esté conectado a su red AP.",
+                          "Error de conexión HTTP")
+            except requests.exceptions.Timeout:
+                result = ("error", "Tiempo de Espera Agotado", f"Tiempo de espera agotado al intentar conectar a {esp32_ip}. Asegúrate de que la IP sea correcta y el ESP32 esté activo.",
+                          "Tiempo de espera HTTP agotado")
+            except Exception as e:
+                result = ("error", "Error Inesperado", f"Ocurrió un error inesperado: {e}", f"Error HTTP inesperado: {e}")
+            try:
+                self.after(0, lambda r=result: self._finish_wifi_http(r))
+            except (RuntimeError, tk.TclError):
+                pass # La ventana se cerró mientras esperábamos la respuesta
+
+        threading.Thread(target=_do_post, name="wifi-http", daemon=True).start()
+
+    def _finish_wifi_http(self, result):
+        """Muestra en el hilo de Tk el resultado del envío HTTP de credenciales."""
+        kind, title, message, status = result
+        if kind == "info":
+            messagebox.showinfo(title, message)
+        else:
+            messagebox.showerror(title, message)
+        self.esp32_wifi_status = status
+        self.actualizar_estado_wifi_esp32_gui()
 
 
     def actualizar_estado_wifi_esp32_gui(self):
@@ -1266,15 +2121,15 @@ class AppInvernadero(tk.Tk):
         Cambia el color del texto según el estado.
         """
         if self.etiqueta_esp32_wifi_status:
-            self.etiqueta_esp32_wifi_status.config(text=f"ESP32 WiFi: {self.esp32_wifi_status}")
             if "CONECTADO OK" in self.esp32_wifi_status:
-                self.etiqueta_esp32_wifi_status.config(foreground="#4CAF50")
+                color = "#4CAF50"
             elif "FALLO" in self.esp32_wifi_status or "NO CREDENCIALES" in self.esp32_wifi_status:
-                self.etiqueta_esp32_wifi_status.config(foreground="#FF5722")
+                color = "#FF5722"
             elif "MODO CONFIGURACION AP" in self.esp32_wifi_status:
-                self.etiqueta_esp32_wifi_status.config(foreground="#FFC107")
+                color = "#FFC107"
             else:
-                self.etiqueta_esp32_wifi_status.config(foreground="white")
+                color = "white"
+            self._actualizar_etiqueta("wifi", text=f"ESP32 WiFi: {self.esp32_wifi_status}", foreground=color)
 
     def avanzar_dias_simulacion(self):
         """Avanza la edad de la planta en un número específico de días."""
@@ -1288,6 +2143,34 @@ class AppInvernadero(tk.Tk):
         except ValueError:
             print("Entrada inválida para días a avanzar. Por favor, introduce un número.")
 
+    def _reiniciar_historiales(self):
+        """Vacía los historiales de los gráficos (buffers circulares de tamaño fijo)."""
+        self.historial_agua = collections.deque(maxlen=self.max_historial_agua)
+        self.historial_altura = HistorialCircular(self.max_puntos_grafico, dtype=np.float32)
+        # Edades absolutas (float64: float32 perdería resolución con edades grandes);
+        # el gráfico las dibuja relativas a self._tiempo_origen_grafico
+        self.historial_tiempo_dias = HistorialCircular(self.max_puntos_grafico)
+        self._tiempo_origen_grafico = 0
+        self._max_altura_cached = 0.0
+
+    def _registrar_historial_altura(self, altura, edad_dias):
+        """Añade un punto al gráfico de altura manteniendo el máximo en O(1)."""
+        lleno = len(self.historial_altura) == self.historial_altura.maxlen
+        descartada = self.historial_altura[0] if lleno else None
+        self.historial_altura.append(altura)
+        self.historial_tiempo_dias.append(edad_dias)
+        # Comparar con el valor ya almacenado en float32, no con el float original
+        altura = self.historial_altura[-1]
+
+        if lleno:
+            # El eje de tiempo arranca en el punto más antiguo que sigue en pantalla
+            self._tiempo_origen_grafico = self.historial_tiempo_dias[0]
+        if altura >= self._max_altura_cached:
+            self._max_altura_cached = altura
+        elif descartada is not None and descartada >= self._max_altura_cached:
+            # Solo se vuelve a recorrer el historial si salió el máximo
+            self._max_altura_cached = float(self.historial_altura.valores().max())
+
     def reiniciar_planta(self):
         """Reinicia la planta a su estado inicial."""
         self.planta = Planta(nombre="Corona de Cristo", etapa_crecimiento="Semilla", edad_dias=0, altura_cm=0.5)
@@ -1296,25 +2179,23 @@ class AppInvernadero(tk.Tk):
         self.deslizador_humedad_aire.set(60)
         self.deslizador_luz.set(500)
         self.deslizador_humedad_suelo.set(500)
-        self.historial_altura = []
-        self.historial_tiempo_dias = []
-        self.historial_agua = []
+        self._reiniciar_historiales()
         self.nivel_tanque_agua = 100
         self.bomba_activa = False
+        self._dirty["tanque"] = True
         self.alerta_led_activo = False
         self.riego_automatico_activo = False # Reiniciar también el estado del riego automático
         self.boton_riego_auto_sensor.config(text="Activar Riego Auto (Sensor)", style="TButton") # Actualizar texto del botón
         self.actualizar_lecturas_ambiente_desde_deslizadores()
         self.actualizar_gui()
+        self._redibujar_lienzos()
 
     def crear_widgets_programacion_riego(self, marco_padre):
-        marco_padre.grid_columnconfigure(0, weight=1)
-        marco_padre.grid_rowconfigure(0, weight=1)
+        self._configure_grid(marco_padre, rows=(1,), cols=(1,))
 
         list_frame = ttk.LabelFrame(marco_padre, text="Horarios de Riego Programados", padding="10", style="TLabelframe")
         list_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-        list_frame.grid_rowconfigure(0, weight=1)
-        list_frame.grid_columnconfigure(0, weight=1)
+        self._configure_grid(list_frame, rows=(1,), cols=(1,))
 
         self.schedule_listbox = tk.Listbox(list_frame, height=10, bg="#333333", fg="white", selectbackground="#424242")
         self.schedule_listbox.grid(row=0, column=0, sticky="nsew")
@@ -1328,7 +2209,7 @@ class AppInvernadero(tk.Tk):
         add_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
         ttk.Label(add_frame, text="Día de la Semana:", style="TLabel").grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.day_combobox = ttk.Combobox(add_frame, values=["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo", "Todos los días"])
+        self.day_combobox = ttk.Combobox(add_frame, values=[*DIAS_SEMANA, "Todos los días"], state="readonly")
         self.day_combobox.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
         self.day_combobox.set("Todos los días")
 
@@ -1351,23 +2232,31 @@ class AppInvernadero(tk.Tk):
         time_str = self.time_entry.get()
         duration_str = self.duration_entry.get()
 
-        try:
-            hour, minute = map(int, time_str.split(':'))
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                raise ValueError("Hora inválida")
-            duration = int(duration_str)
-            if not (1 <= duration <= 60):
-                raise ValueError("Duración inválida (1-60 min)")
-        except ValueError as e:
-            messagebox.showerror("Error de Entrada", f"Formato de hora o duración inválido: {e}")
+        coincidencia = _HORA_RE.fullmatch(time_str.strip())
+        duration_str = duration_str.strip()
+        if day != "Todos los días" and day not in INDICE_DIA_SEMANA:
+            error = "Día inválido"
+        elif not coincidencia:
+            error = "Hora inválida"
+        elif not (_DURACION_RE.fullmatch(duration_str) and 1 <= int(duration_str) <= 60):
+            error = "Duración inválida (1-60 min)"
+        else:
+            error = None
+        if error:
+            messagebox.showerror("Error de Entrada", f"Formato de hora o duración inválido: {error}")
             return
+        hour, minute = int(coincidencia.group(1)), int(coincidencia.group(2))
+        duration = int(duration_str)
 
-        new_schedule = {"day": day, "time": time_str, "duration": duration}
+        # Se guarda normalizada a HH:MM ("7:05" -> "07:05")
+        new_schedule = {"day": day, "time": f"{hour:02d}:{minute:02d}", "duration": duration}
         global irrigation_schedule
         irrigation_schedule.append(new_schedule)
         save_schedule()
+        self.programar_guardado(flush_schedule)
+        self.rearmar_riego_programado()
         self.actualizar_lista_horarios()
-        messagebox.showinfo("Horario Añadido", "Horario de riego añadido exitosamente.")
+        self.mostrar_aviso("Horario de riego añadido exitosamente.")
 
     def eliminar_horario_riego(self):
         selected_indices = self.schedule_listbox.curselection()
@@ -1379,8 +2268,10 @@ class AppInvernadero(tk.Tk):
             global irrigation_schedule
             del irrigation_schedule[index]
         save_schedule()
+        self.programar_guardado(flush_schedule)
+        self.rearmar_riego_programado()
         self.actualizar_lista_horarios()
-        messagebox.showinfo("Horario Eliminado", "Horario(s) de riego eliminado(s) exitosamente.")
+        self.mostrar_aviso("Horario(s) de riego eliminado(s) exitosamente.")
 
     def actualizar_lista_horarios(self):
         self.schedule_listbox.delete(0, tk.END)
@@ -1389,48 +2280,69 @@ class AppInvernadero(tk.Tk):
 
     def verificar_riego_programado(self):
         """
-        Función que se ejecuta en un hilo separado para verificar los horarios de riego.
+        Dispara los horarios de riego vencidos, desde el bucle de eventos de Tk.
+        heap_horarios_riego está ordenado por el próximo disparo: cada comprobación solo mira
+        la cima del montículo y cada horario disparado se reinserta en O(log N).
         """
-        last_check_minute = -1
-        while True:
-            now = datetime.datetime.now()
-            current_day = now.strftime("%A")
-            current_time_str = now.strftime("%H:%M")
-            current_minute = now.minute
-
-            if current_minute == last_check_minute:
-                time.sleep(10)
-                continue
-            last_check_minute = current_minute
-
-            for schedule in irrigation_schedule:
-                schedule_day = schedule["day"]
-                schedule_time = schedule["time"]
-                schedule_duration = schedule["duration"]
-
-                if (schedule_day == "Todos los días" or schedule_day == current_day) and schedule_time == current_time_str:
-                    print(f"¡Es hora de regar! Día: {current_day}, Hora: {current_time_str}, Duración: {schedule_duration} min")
-                    self.after(0, lambda: self.ejecutar_riego(schedule_duration))
-                    time.sleep(schedule_duration * 60 + 5)
-                    last_check_minute = -1
-                    break
+        ahora = datetime.datetime.now()
+        ahora_ts = ahora.timestamp()
+        # El siguiente disparo se calcula desde ahora (no desde el vencido): tras una suspensión
+        # cada horario dispara como mucho una vez y las ocurrencias perdidas no se recuperan
+        desde = ahora + datetime.timedelta(seconds=1)
+        while heap_horarios_riego and heap_horarios_riego[0][0] <= ahora_ts:
+            marca_disparo, indice = heapq.heappop(heap_horarios_riego)
+            schedule = irrigation_schedule[indice]
+            retraso_s = ahora_ts - marca_disparo
+            if retraso_s <= TOLERANCIA_RIEGO_S:
+                log.info("¡Es hora de regar! Día: %s, Hora: %s, Duración: %s min", schedule["day"], schedule["time"], schedule["duration"])
+                self.ejecutar_riego(schedule["duration"])
+            else:
+                log.warning("Riego de %s %s omitido: llegó %.0f s tarde", schedule["day"], schedule["time"], retraso_s)
+            siguiente = proximo_disparo_riego(schedule, desde)
+            heapq.heappush(heap_horarios_riego, (siguiente.timestamp(), indice))
+
+        # Despertar justo en el próximo disparo. Los cambios de horarios rearman el temporizador
+        # (rearmar_riego_programado); el tope solo cubre ajustes del reloj del sistema.
+        espera_s = MAX_ESPERA_RIEGO_S
+        if heap_horarios_riego:
+            espera_s = min(espera_s, max(0.5, heap_horarios_riego[0][0] - ahora.timestamp()))
+        self._riego_after_id = self.after(int(espera_s * 1000), self.verificar_riego_programado)
+
+    def rearmar_riego_programado(self):
+        """Recalcula la próxima espera tras añadir o eliminar horarios (el índice ya está reconstruido)."""
+        if self._riego_after_id is not None:
+            self.after_cancel(self._riego_after_id)
+        self.verificar_riego_programado()
+
+    def mostrar_aviso(self, texto, duracion_ms=3000):
+        """
+        Muestra un aviso en la barra inferior y lo borra pasados duracion_ms.
+        A diferencia de messagebox no es modal: la GUI y el MQTT siguen funcionando.
+        """
+        log.info("Aviso: %s", texto)
+        if self._etiqueta_aviso is None:
+            return
+        self._etiqueta_aviso.config(text=texto)
+        if self._aviso_after_id is not None:
+            self.after_cancel(self._aviso_after_id) # Un aviso nuevo reinicia la cuenta atrás
+        self._aviso_after_id = self.after(duracion_ms, self._borrar_aviso)
 
-            time.sleep(30)
+    def _borrar_aviso(self):
+        self._aviso_after_id = None
+        self._etiqueta_aviso.config(text="")
 
     def ejecutar_riego(self, duracion_minutos):
         """
         Envía el comando MQTT para encender la bomba y luego apagarla después de la duración.
         """
-        messagebox.showinfo("Riego Automático", f"Iniciando riego automático por {duracion_minutos} minutos.")
+        # Aviso no modal: un riego programado puede dispararse sin nadie delante de la pantalla
+        self.mostrar_aviso(f"Iniciando riego automático por {duracion_minutos} minutos.")
         self.controlar_bomba("ON")
         self.after(duracion_minutos * 60 * 1000, lambda: self.controlar_bomba("OFF"))
 
 
     def crear_widgets_rangos_sensores(self, marco_padre):
-        marco_padre.grid_columnconfigure(0, weight=1)
-        marco_padre.grid_columnconfigure(1, weight=1)
-        marco_padre.grid_columnconfigure(2, weight=1)
-        marco_padre.grid_columnconfigure(3, weight=1)
+        self._configure_grid(marco_padre, cols=(1, 1, 1, 1))
 
         self.sensor_entries = {}
 
@@ -1487,8 +2399,10 @@ class AppInvernadero(tk.Tk):
                     raise ValueError(f"Rangos inválidos para {sensor_name}. Asegúrate de que letal_min <= ideal_min <= ideal_max <= letal_max.")
 
             sensor_ranges.update(new_ranges)
+            actualizar_rangos_arr()
             save_config()
-            messagebox.showinfo("Rangos Guardados", "Los rangos de los sensores se han guardado exitosamente.")
+            self.programar_guardado(flush_config)
+            self.mostrar_aviso("Los rangos de los sensores se han guardado exitosamente.")
         except ValueError as e:
             messagebox.showerror("Error de Validación", f"Error al guardar rangos: {e}. Asegúrate de que los valores sean numéricos y los rangos sean lógicos.")
         except Exception as e:
@@ -1506,56 +2420,39 @@ class AppInvernadero(tk.Tk):
             dias_simulados_por_paso = 0.1
             simular_crecimiento(self.planta, dias_simulados_por_paso, lecturas_actuales)
 
-        for clave, valor_defecto in {"temperatura": 25.0, "humedad_aire": 60.0, "humedad_suelo": 500, "luz": 500}.items():
+        for clave, valor_defecto in LECTURAS_POR_DEFECTO:
             if lecturas_actuales.get(clave) is None:
                 lecturas_actuales[clave] = valor_defecto
 
-        self.historial_altura.append(self.planta.altura_cm)
-        self.historial_tiempo_dias.append(self.planta.edad_dias)
-
-        if len(self.historial_altura) > self.max_puntos_grafico:
-            self.historial_altura.pop(0)
-            self.historial_tiempo_dias.pop(0)
-            tiempo_offset = self.historial_tiempo_dias[0]
-            self.historial_tiempo_dias = [t - tiempo_offset for t in self.historial_tiempo_dias]
-
+        self._registrar_historial_altura(self.planta.altura_cm, self.planta.edad_dias)
         self.historial_agua.append(self.nivel_tanque_agua)
-        if len(self.historial_agua) > self.max_historial_agua:
-            self.historial_agua.pop(0)
-
-        self.etiquetas_planta_info["Nombre"].config(text=f"{self.planta.nombre}")
-        self.etiquetas_planta_info["Salud"].config(text=f"{self.planta.salud:.1f}%")
-        self.etiquetas_planta_info["Altura"].config(text=f"{self.planta.altura_cm:.1f} cm")
-        self.etiquetas_planta_info["Etapa de Crecimiento"].config(text=self.planta.etapa_crecimiento)
-        self.etiquetas_planta_info["Edad_Dias"].config(text=f"{self.planta.edad_dias:.2f} días")
-        self.etiquetas_planta_info["Edad_Anios"].config(text=f"{self.planta.edad_dias / 365.25:.2f} años")
-        self.etiquetas_planta_info["Tipo_Planta"].config(text=f"{self.planta.tipo_planta}")
+        self._dirty["altura"] = self._dirty["agua"] = True
+        # Redibujar la planta solo si cambia su estado discreto (etapa, color, muerte)
+        # o si la altura o la salud varían más de un 1 % respecto al último dibujo
+        estado_planta = (self.planta.etapa_crecimiento, self.planta.esta_muerta, self.planta.obtener_color_etapa())
+        previa = self._firma_planta
+        if (previa is None or previa[0] != estado_planta
+                or abs(self.planta.altura_cm - previa[1]) > 0.01 * abs(previa[1])
+                or abs(self.planta.salud - previa[2]) > 0.01 * abs(previa[2])):
+            self._firma_planta = (estado_planta, self.planta.altura_cm, self.planta.salud)
+            self._dirty["planta"] = True
+
+        self._actualizar_etiqueta("Nombre", text=f"{self.planta.nombre}")
+        self._actualizar_etiqueta("Salud", text=f"{self.planta.salud:.1f}%")
+        self._actualizar_etiqueta("Altura", text=f"{self.planta.altura_cm:.1f} cm")
+        self._actualizar_etiqueta("Etapa de Crecimiento", text=self.planta.etapa_crecimiento)
+        self._actualizar_etiqueta("Edad_Dias", text=f"{self.planta.edad_dias:.2f} días")
+        self._actualizar_etiqueta("Edad_Anios", text=f"{self.planta.edad_dias / 365.25:.2f} años")
+        self._actualizar_etiqueta("Tipo_Planta", text=f"{self.planta.tipo_planta}")
 
         # Lógica de Notificaciones de la GUI (coherente con ESP32)
+        # Umbrales letales precalculados en tabla_alertas (se reconstruye al cambiar los rangos)
         notificaciones = []
-        temp = lecturas_actuales.get("temperatura")
-        hum_air = lecturas_actuales.get("humedad_aire")
+        for clave, alerta_min, alerta_max, mensaje in tabla_alertas:
+            valor = lecturas_actuales.get(clave)
+            if valor is not None and (valor < alerta_min or valor > alerta_max):
+                notificaciones.append(mensaje)
         hum_soil = lecturas_actuales.get("humedad_suelo")
-        luz = lecturas_actuales.get("luz")
-
-        # Usar los rangos globales para las notificaciones
-        temp_alert_min = sensor_ranges["temperatura"]["letal_min"]
-        temp_alert_max = sensor_ranges["temperatura"]["letal_max"]
-        hum_air_alert_min = sensor_ranges["humedad_aire"]["letal_min"]
-        hum_air_alert_max = sensor_ranges["humedad_aire"]["letal_max"]
-        hum_soil_alert_min = sensor_ranges["humedad_suelo"]["letal_min"]
-        hum_soil_alert_max = sensor_ranges["humedad_suelo"]["letal_max"]
-        luz_alert_min = sensor_ranges["luz"]["letal_min"]
-        luz_alert_max = sensor_ranges["luz"]["letal_max"]
-
-        if temp is not None and (temp < temp_alert_min or temp > temp_alert_max):
-            notificaciones.append("Temperatura fuera de rango!")
-        if hum_air is not None and (hum_air < hum_air_alert_min or hum_air > hum_air_alert_max):
-            notificaciones.append("Humedad del aire incorrecta!")
-        if hum_soil is not None and (hum_soil < hum_soil_alert_min or hum_soil > hum_soil_alert_max):
-            notificaciones.append("Humedad del suelo crítica!")
-        if luz is not None and (luz < luz_alert_min or luz > luz_alert_max):
-            notificaciones.append("Nivel de luz inadecuado!")
 
         # Lógica de riego automático por sensor (solo para visualización en GUI, el control lo hace el ESP32)
         # La GUI solo publica el comando de activar/desactivar, el ESP32 es el que decide cuándo encender/apagar la bomba
@@ -1574,131 +2471,251 @@ class AppInvernadero(tk.Tk):
 
         if self.planta.esta_muerta:
             notificaciones = ["¡Advertencia: La planta ha muerto! 💀"]
-            self.etiqueta_notificacion.config(foreground="darkgrey")
+            self._actualizar_etiqueta("notificacion", foreground="darkgrey")
         elif not notificaciones:
-            self.etiqueta_notificacion.config(text="Estado: Todo bien en el invernadero.", foreground="white")
+            self._actualizar_etiqueta("notificacion", text="Estado: Todo bien en el invernadero.", foreground="white")
         else:
-            self.etiqueta_notificacion.config(text="\n".join(["¡PROBLEMA!"] + notificaciones), foreground="red")
+            self._actualizar_etiqueta("notificacion", text="\n".join(["¡PROBLEMA!"] + notificaciones), foreground="red")
 
-        print(f"DEBUG: Actualizando etiquetas visuales con: {lecturas_actuales}") # Línea de depuración añadida
-        if self.etiqueta_sens_temp:
-            self.etiqueta_sens_temp.config(text=f"Temp: {lecturas_actuales['temperatura']:.1f}°C")
-            self.etiqueta_sens_hum_aire.config(text=f"Hum Aire: {lecturas_actuales['humedad_aire']:.1f}%")
-            self.etiqueta_sens_hum_suelo.config(text=f"Hum Suelo: {lecturas_actuales['humedad_suelo']:.0f} (0-1023)")
-            self.etiqueta_sens_luz.config(text=f"Luz: {lecturas_actuales['luz']:.0f} (0-1023)")
+        log.debug("Actualizando etiquetas visuales con: %s", lecturas_actuales)
+        self._actualizar_etiqueta("sens_temp", text=f"Temp: {lecturas_actuales['temperatura']:.1f}°C")
+        self._actualizar_etiqueta("sens_hum_aire", text=f"Hum Aire: {lecturas_actuales['humedad_aire']:.1f}%")
+        self._actualizar_etiqueta("sens_hum_suelo", text=f"Hum Suelo: {lecturas_actuales['humedad_suelo']:.0f} (0-1023)")
+        self._actualizar_etiqueta("sens_luz", text=f"Luz: {lecturas_actuales['luz']:.0f} (0-1023)")
 
-        self.dibujar_planta()
-        self.dibujar_grafico_agua()
-        self.dibujar_tanque_agua()
-        self.dibujar_grafico_altura()
-        self.dibujar_indicador_alerta_led()
-        self.actualizar_estado_wifi_esp32_gui()
+        if manual_advance:
+            self._redibujar_lienzos() # El usuario espera ver el salto de días en el acto
 
-        self.after(500, self.actualizar_gui)
+    def _tick_gui(self):
+        """Tick rápido (500 ms): simulación, etiquetas y notificaciones."""
+        self.actualizar_gui()
+        self.after(500, self._tick_gui)
+
+    def _tick_lienzos(self):
+        """Tick lento (1 s): redibuja solo los lienzos marcados como sucios."""
+        self._redibujar_lienzos()
+        self.after(1000, self._tick_lienzos)
+
+    def _redibujar_lienzos(self):
+        # El LED y el estado WiFi se actualizan en sus manejadores MQTT; el indicador LED
+        # además no toca el lienzo si el color no cambió
+        if self._dirty["planta"]:
+            self._programar_dibujo_planta()
+        if self._dirty["agua"]:
+            self.dibujar_grafico_agua()
+        if self._dirty["tanque"] or self.bomba_activa: # Con la bomba activa la animación sigue avanzando
+            self.dibujar_tanque_agua()
+        if self._dirty["altura"]:
+            self.dibujar_grafico_altura()
+        self.dibujar_indicador_alerta_led()
+        for clave in self._dirty:
+            self._dirty[clave] = False
+
+    def _rasterizar_marco_invernadero(self, lienzo_ancho, lienzo_alto):
+        """Pinta el marco del invernadero en una imagen RGBA (el relleno translúcido sustituye al stipple gray50)."""
+        imagen = Image.new("RGBA", (lienzo_ancho, lienzo_alto), (0, 0, 0, 0))
+        dibujo = ImageDraw.Draw(imagen)
+        vidrio = (0xB3, 0xE0, 0xF2, 128)
+        borde = "#455A64"
+        dibujo.rectangle((50, lienzo_alto - 50, lienzo_ancho - 50, lienzo_alto - 30), fill="#607D8B", outline=borde, width=2)
+        dibujo.rectangle((50, 50, lienzo_ancho - 50, lienzo_alto - 50), fill=vidrio, outline=borde, width=2)
+        dibujo.polygon(((50, 50), (lienzo_ancho - 50, 50), (lienzo_ancho / 2, 20)), fill=vidrio)
+        dibujo.line(((50, 50), (lienzo_ancho / 2, 20), (lienzo_ancho - 50, 50)), fill=borde, width=2)
+        dibujo.line(((lienzo_ancho / 2, 50), (lienzo_ancho / 2, lienzo_alto - 50)), fill=borde, width=1)
+        dibujo.line(((50, (lienzo_alto - 50) / 2 + 50), (lienzo_ancho - 50, (lienzo_alto - 50) / 2 + 50)), fill=borde, width=1)
+        return ImageTk.PhotoImage(imagen)
 
     def dibujar_marco_invernadero(self, lienzo):
-        """Dibuja el marco del invernadero en el lienzo especificado."""
-        lienzo.delete("estructura_invernadero")
+        """Dibuja el marco del invernadero en el lienzo especificado (una sola imagen, rasterizada por tamaño)."""
         lienzo_ancho = lienzo.winfo_width()
         lienzo_alto = lienzo.winfo_height()
 
         if lienzo_ancho < 100 or lienzo_alto < 100:
+            lienzo.delete("estructura_invernadero")
             return
 
-        lienzo.create_rectangle(50, lienzo_alto - 50, lienzo_ancho - 50, lienzo_alto - 30, fill="#607D8B", outline="#455A64", width=2, tags="estructura_invernadero")
-        lienzo.create_rectangle(50, 50, lienzo_ancho - 50, lienzo_alto - 50, fill="#B3E0F2", outline="#455A64", width=2, stipple="gray50", tags="estructura_invernadero")
-        lienzo.create_polygon(50, 50, lienzo_ancho - 50, 50, lienzo_ancho/2, 20, fill="#B3E0F2", outline="#455A64", width=2, stipple="gray50", tags="estructura_invernadero")
-        lienzo.create_line(50, 50, lienzo_ancho/2, 20, fill="#455A64", width=2, tags="estructura_invernadero")
-        lienzo.create_line(lienzo_ancho - 50, 50, lienzo_ancho/2, 20, fill="#455A64", width=2, tags="estructura_invernadero")
-        lienzo.create_line(lienzo_ancho/2, 50, lienzo_ancho/2, lienzo_alto-50, fill="#455A64", width=1, tags="estructura_invernadero")
-        lienzo.create_line(50, (lienzo_alto-50)/2 + 50, lienzo_ancho-50, (lienzo_alto-50)/2 + 50, fill="#455A64", width=1, tags="estructura_invernadero")
+        tamano = (lienzo_ancho, lienzo_alto)
+        if self._marco_cache is None or self._marco_cache[0] != tamano:
+            self._marco_cache = (tamano, self._rasterizar_marco_invernadero(lienzo_ancho, lienzo_alto))
+        imagen = self._marco_cache[1]
 
+        item = lienzo.find_withtag("estructura_invernadero")
+        if item:
+            lienzo.itemconfigure(item[0], image=imagen)
+        else:
+            lienzo.create_image(0, 0, image=imagen, anchor="nw", tags="estructura_invernadero")
+        lienzo.tag_lower("estructura_invernadero") # La planta siempre por encima del marco
+
+
+    def _crear_items_planta(self, lienzo):
+        """Crea (ocultos y sin geometría) todos los items que puede necesitar el dibujo de la planta."""
+        def oval(**opciones):
+            return lienzo.create_oval(0, 0, 0, 0, state="hidden", **opciones)
+        def rect(**opciones):
+            return lienzo.create_rectangle(0, 0, 0, 0, state="hidden", **opciones)
+        def linea(**opciones):
+            return lienzo.create_line(0, 0, 0, 0, state="hidden", **opciones)
+
+        # El orden de creación fija el apilado: suelo, tallo, dosel, hojas marchitas, restos, flor/fruto
+        items = {"suelo": rect(fill="brown", outline="brown", tags="elementos_planta")}
+        items["tallo"] = rect(tags="elementos_planta")
+        items["dosel"] = [oval(tags="elementos_planta") for _ in range(3)]
+        items["hojas_marchitas"] = [linea(fill="darkorange", width=1, tags="hoja_marchita") for _ in range(2)]
+        items["muerta"] = [
+            rect(fill="darkgrey", outline="black", tags="elementos_muertos"),
+            oval(fill="black", outline="black", tags="elementos_muertos"),
+            # Las dos aspas del "✕" son una sola línea de varios tramos (ver dibujar_planta)
+            linea(fill="brown", width=2, joinstyle="bevel", tags="elementos_muertos"),
+            lienzo.create_text(0, 0, text="✝️", font=("Arial", 30), fill="black", state="hidden", tags="elementos_muertos"),
+        ]
+        items["flor"] = oval(fill="magenta", outline="purple", tags="flor")
+        items["fruto"] = oval(fill="red", outline="darkred", tags="fruto")
+        # Opciones ya aplicadas por item o tag (ver _configurar_item_planta); todo nace oculto
+        items["opciones"] = {
+            item: {"state": "hidden"}
+            for item in (items["suelo"], items["tallo"], *items["dosel"], items["flor"], items["fruto"],
+                         "hoja_marchita", "elementos_muertos")
+        }
+        # Entradas del último dibujo de cada subescena (ver _subescena_cambiada)
+        items["entradas"] = {}
+        return items
+
+    def _subescena_cambiada(self, grupo, *entradas):
+        """True (y las recuerda) si las entradas de la subescena difieren de las del último dibujo."""
+        previas = self._planta_items["entradas"]
+        if previas.get(grupo) == entradas:
+            return False
+        previas[grupo] = entradas
+        return True
+
+    def _configurar_item_planta(self, lienzo, item, **opciones):
+        """itemconfigure solo con las opciones que cambiaron desde el último dibujo (item puede ser id o tag)."""
+        aplicadas = self._planta_items["opciones"].setdefault(item, {})
+        cambios = {clave: valor for clave, valor in opciones.items() if aplicadas.get(clave) != valor}
+        if cambios:
+            lienzo.itemconfigure(item, **cambios)
+            aplicadas.update(cambios)
+
+    def _programar_dibujo_planta(self):
+        """Pide un dibujo de la planta; varias peticiones antes del próximo ciclo ocioso de Tk se funden en uno."""
+        if not self._dibujo_planta_pendiente:
+            self._dibujo_planta_pendiente = True
+            self.after_idle(self._dibujar_planta_pendiente)
+
+    def _dibujar_planta_pendiente(self):
+        self._dibujo_planta_pendiente = False
+        self.dibujar_planta()
 
     def dibujar_planta(self):
         """Dibuja la planta en el lienzo de la ventana de animación basándose en su estado actual."""
-        if not self.lienzo_animacion_planta or not self.lienzo_animacion_planta.winfo_exists():
+        lienzo = self.lienzo_animacion_planta
+        if not lienzo or not lienzo.winfo_exists():
             return
 
-        self.lienzo_animacion_planta.delete("elementos_planta")
-        self.lienzo_animacion_planta.delete("fruto")
-        self.lienzo_animacion_planta.delete("flor")
-        self.lienzo_animacion_planta.delete("hoja_marchita")
-        self.lienzo_animacion_planta.delete("elementos_muertos")
-
-        lienzo_ancho = self.lienzo_animacion_planta.winfo_width()
-        lienzo_alto = self.lienzo_animacion_planta.winfo_height()
+        lienzo_ancho = lienzo.winfo_width()
+        lienzo_alto = lienzo.winfo_height()
 
         if lienzo_ancho == 1 or lienzo_alto == 1:
             return
 
+        if self._planta_items is None:
+            self._planta_items = self._crear_items_planta(lienzo)
+        items = self._planta_items
+
         suelo_planta_y_inferior = lienzo_alto - 35
         suelo_planta_y_superior = suelo_planta_y_inferior - 20
 
         base_x = lienzo_ancho / 2
 
-        self.lienzo_animacion_planta.create_rectangle(base_x - 80, suelo_planta_y_superior, base_x + 80, suelo_planta_y_inferior, fill="brown", outline="brown", tags="elementos_planta")
+        if self._subescena_cambiada("suelo", lienzo_ancho, lienzo_alto):
+            lienzo.coords(items["suelo"], base_x - 80, suelo_planta_y_superior, base_x + 80, suelo_planta_y_inferior)
+        self._configurar_item_planta(lienzo, items["suelo"], state="normal")
+
+        planta = self.planta
+        altura_cm = planta.altura_cm
+        esta_muerta = planta.esta_muerta
 
         altura_maxima_permitida_visual = suelo_planta_y_inferior - 55
-        altura_visual = min(self.planta.altura_cm * 4, altura_maxima_permitida_visual)
+        altura_visual = min(altura_cm * 4, altura_maxima_permitida_visual)
         altura_visual = max(altura_visual, 5)
 
-        ancho_tallo = max(2, min(10, self.planta.altura_cm / 5))
+        ancho_tallo = max(2, min(10, altura_cm / 5))
+        medio_tallo = ancho_tallo / 2
 
-        color_planta = self.planta.obtener_color_etapa()
+        color_planta = planta.obtener_color_etapa()
 
         tallo_y_superior = suelo_planta_y_inferior - altura_visual
-        self.lienzo_animacion_planta.create_rectangle(base_x - ancho_tallo/2, tallo_y_superior,
-                                      base_x + ancho_tallo/2, suelo_planta_y_inferior,
-                                      fill=color_planta, outline=color_planta, tags="elementos_planta")
-
-        base_dosel_y = tallo_y_superior + (ancho_tallo/2)
-        ancho_max_dosel = min(max(20, self.planta.altura_cm * 1.5), 100)
-        ancho_dosel_actual = ancho_max_dosel * (self.planta.salud / 100.0)
+        # Cada subescena (tallo, dosel, hojas marchitas, restos, flor, fruto) solo mueve sus
+        # items si cambió alguna de sus entradas; el color y la visibilidad los filtra
+        # _configurar_item_planta
+        if self._subescena_cambiada("tallo", base_x, tallo_y_superior, ancho_tallo, suelo_planta_y_inferior):
+            lienzo.coords(items["tallo"], base_x - medio_tallo, tallo_y_superior,
+                          base_x + medio_tallo, suelo_planta_y_inferior)
+        self._configurar_item_planta(lienzo, items["tallo"], fill=color_planta, outline=color_planta, state="normal")
+
+        base_dosel_y = tallo_y_superior + medio_tallo
+        ancho_max_dosel = min(max(20, altura_cm * 1.5), 100)
+        ancho_dosel_actual = ancho_max_dosel * (planta.salud / 100.0)
         altura_dosel_actual = altura_visual * 0.7
 
-        self.lienzo_animacion_planta.create_oval(base_x - ancho_dosel_actual/2, base_dosel_y - altura_dosel_actual/2,
-                                 base_x + ancho_dosel_actual/2, base_dosel_y + altura_dosel_actual/2,
-                                 fill=color_planta, outline=color_planta, tags="elementos_planta")
-        self.lienzo_animacion_planta.create_oval(base_x - ancho_dosel_actual/3 - 10, base_dosel_y - altura_dosel_actual/2 + 5,
-                                 base_x + ancho_dosel_actual/3 - 10, base_dosel_y + altura_dosel_actual/2 - 5,
-                                 fill=color_planta, outline=color_planta, tags="elementos_planta")
-        self.lienzo_animacion_planta.create_oval(base_x - ancho_dosel_actual/3 + 10, base_dosel_y - altura_dosel_actual/2 + 5,
-                                 base_x + ancho_dosel_actual/3 + 10, base_dosel_y + altura_dosel_actual/2 - 5,
-                                 fill=color_planta, outline=color_planta, tags="elementos_planta")
-
-
-        if self.planta.salud < 40 and not self.planta.esta_muerta:
-             self.lienzo_animacion_planta.create_line(base_x + ancho_dosel_actual/4, base_dosel_y - altura_dosel_actual/4,
-                                     base_x + ancho_dosel_actual/4 + 10, base_dosel_y - altura_dosel_actual/4 + 10,
-                                     fill="darkorange", width=1, tags="hoja_marchita")
-             self.lienzo_animacion_planta.create_line(base_x - ancho_dosel_actual/4, base_dosel_y - altura_dosel_actual/4,
-                                     base_x - ancho_dosel_actual/4 - 10, base_dosel_y - altura_dosel_actual/4 + 10,
-                                     fill="darkorange", width=1, tags="hoja_marchita")
-
-
-        if self.planta.esta_muerta:
-            self.lienzo_animacion_planta.create_rectangle(base_x - ancho_tallo/2, tallo_y_superior,
-                                          base_x + ancho_tallo/2, suelo_planta_y_inferior,
-                                          fill="darkgrey", outline="black", tags="elementos_muertos")
-            radio_dosel_muerto = min(max(5, self.planta.altura_cm * 0.5), 30)
-            self.lienzo_animacion_planta.create_oval(base_x - radio_dosel_muerto, base_dosel_y - radio_dosel_muerto,
-                                     base_x + radio_dosel_muerto, base_dosel_y + radio_dosel_muerto,
-                                     fill="black", outline="black", tags="elementos_muertos")
-            self.lienzo_animacion_planta.create_line(base_x - 10, tallo_y_superior + 5, base_x + 10, tallo_y_superior + 15, fill="brown", width=2, tags="elementos_muertos")
-            self.lienzo_animacion_planta.create_line(base_x + 10, tallo_y_superior + 5, base_x - 10, tallo_y_superior + 15, fill="brown", width=2, tags="elementos_muertos")
-            self.lienzo_animacion_planta.create_text(base_x, tallo_y_superior + altura_visual / 4, text="✝️", font=("Arial", 30), fill="black", tags="elementos_muertos")
+        geometria_dosel = (base_x, base_dosel_y, ancho_dosel_actual, altura_dosel_actual)
+        if self._subescena_cambiada("dosel", *geometria_dosel):
+            dosel_central, dosel_izquierdo, dosel_derecho = items["dosel"]
+            medio_ancho = ancho_dosel_actual / 2
+            tercio_ancho = ancho_dosel_actual / 3
+            dosel_y1 = base_dosel_y - altura_dosel_actual / 2
+            dosel_y2 = base_dosel_y + altura_dosel_actual / 2
+            lienzo.coords(dosel_central, base_x - medio_ancho, dosel_y1, base_x + medio_ancho, dosel_y2)
+            lienzo.coords(dosel_izquierdo, base_x - tercio_ancho - 10, dosel_y1 + 5, base_x + tercio_ancho - 10, dosel_y2 - 5)
+            lienzo.coords(dosel_derecho, base_x - tercio_ancho + 10, dosel_y1 + 5, base_x + tercio_ancho + 10, dosel_y2 - 5)
+        for item in items["dosel"]:
+            self._configurar_item_planta(lienzo, item, fill=color_planta, outline=color_planta, state="normal")
+
+        if planta.salud < 40 and not esta_muerta:
+            if self._subescena_cambiada("hoja_marchita", *geometria_dosel):
+                hoja_derecha, hoja_izquierda = items["hojas_marchitas"]
+                cuarto_ancho = ancho_dosel_actual / 4
+                hoja_y = base_dosel_y - altura_dosel_actual / 4
+                lienzo.coords(hoja_derecha, base_x + cuarto_ancho, hoja_y, base_x + cuarto_ancho + 10, hoja_y + 10)
+                lienzo.coords(hoja_izquierda, base_x - cuarto_ancho, hoja_y, base_x - cuarto_ancho - 10, hoja_y + 10)
+            self._configurar_item_planta(lienzo, "hoja_marchita", state="normal")
+        else:
+            self._configurar_item_planta(lienzo, "hoja_marchita", state="hidden")
+
+        if esta_muerta:
+            radio_dosel_muerto = min(max(RADIO_DOSEL_MUERTO_MIN, altura_cm * 0.5), RADIO_DOSEL_MUERTO_MAX)
+            if self._subescena_cambiada("elementos_muertos", base_x, tallo_y_superior, ancho_tallo,
+                                        suelo_planta_y_inferior, base_dosel_y, radio_dosel_muerto):
+                tallo_muerto, dosel_muerto, aspas, cruz = items["muerta"]
+                lienzo.coords(tallo_muerto, base_x - medio_tallo, tallo_y_superior,
+                              base_x + medio_tallo, suelo_planta_y_inferior)
+                lienzo.coords(dosel_muerto, base_x - radio_dosel_muerto, base_dosel_y - radio_dosel_muerto,
+                              base_x + radio_dosel_muerto, base_dosel_y + radio_dosel_muerto)
+                # Primera aspa, vuelta al centro por encima de ella y segunda aspa completa
+                lienzo.coords(aspas, base_x - 10, tallo_y_superior + 5, base_x + 10, tallo_y_superior + 15,
+                              base_x, tallo_y_superior + 10, base_x + 10, tallo_y_superior + 5,
+                              base_x - 10, tallo_y_superior + 15)
+                lienzo.coords(cruz, base_x, tallo_y_superior + altura_visual / 4)
+            self._configurar_item_planta(lienzo, "elementos_muertos", state="normal")
+        else:
+            self._configurar_item_planta(lienzo, "elementos_muertos", state="hidden")
 
         pos_y_flor_fruto = tallo_y_superior - 10
-        if self.planta.etapa_crecimiento == "Floración" and not self.planta.esta_muerta:
-            tamano_flor = 10
-            self.lienzo_animacion_planta.create_oval(base_x - tamano_flor, pos_y_flor_fruto - tamano_flor,
-                                     base_x + tamano_flor, pos_y_flor_fruto + tamano_flor,
-                                     fill="magenta", outline="purple", tags="flor")
-        elif self.planta.etapa_crecimiento == "Fructificación" and not self.planta.esta_muerta:
-            tamano_fruto = 8
-            self.lienzo_animacion_planta.create_oval(base_x - tamano_fruto, pos_y_flor_fruto - tamano_fruto,
-                                     base_x + tamano_fruto, pos_y_flor_fruto + tamano_fruto,
-                                     fill="red", outline="darkred", tags="fruto")
+        etapa = planta.etapa_crecimiento
+        if etapa == "Floración" and not esta_muerta:
+            if self._subescena_cambiada("flor", base_x, pos_y_flor_fruto):
+                lienzo.coords(items["flor"], base_x - RADIO_FLOR, pos_y_flor_fruto - RADIO_FLOR,
+                              base_x + RADIO_FLOR, pos_y_flor_fruto + RADIO_FLOR)
+            self._configurar_item_planta(lienzo, items["flor"], state="normal")
+        else:
+            self._configurar_item_planta(lienzo, items["flor"], state="hidden")
+        if etapa == "Fructificación" and not esta_muerta:
+            if self._subescena_cambiada("fruto", base_x, pos_y_flor_fruto):
+                lienzo.coords(items["fruto"], base_x - RADIO_FRUTO, pos_y_flor_fruto - RADIO_FRUTO,
+                              base_x + RADIO_FRUTO, pos_y_flor_fruto + RADIO_FRUTO)
+            self._configurar_item_planta(lienzo, items["fruto"], state="normal")
+        else:
+            self._configurar_item_planta(lienzo, items["fruto"], state="hidden")
 
 
 class WiFiScannerGUI:
@@ -1707,16 +2724,28 @@ class WiFiScannerGUI:
         self.root.title("ESP32 WiFi Configuration")
         self.root.geometry("400x400")
 
-        self.mqtt_client = mqtt.Client()
+        # on_message corre en el hilo de red de paho: solo encola; _drain_ring toca los widgets
+        self._mqtt_ring = AnilloMensajesMQTT()
+        # Tema -> manejador (se ejecuta en el hilo de Tk con la carga en bytes)
+        self._handlers = {
+            "invernadero/wifi/scan_results": self._h_scan_results,
+            "invernadero/status/wifi": self._h_status_wifi,
+        }
+
+        # Sesión persistente con un id estable por equipo (MAC): al reconectar el broker conserva
+        # las suscripciones y on_connect no tiene que repetirlas
+        self.mqtt_client = mqtt.Client(client_id=f"gui-wifi-{uuid.getnode():x}", clean_session=False)
         self.mqtt_client.on_connect = self.on_connect
         self.mqtt_client.on_message = self.on_message
-        self.mqtt_client.connect("broker.hivemq.com", 1883)
+        self.mqtt_client.connect("broker.hivemq.com", 1883, keepalive=30) # Detecta antes un enlace caído
         self.mqtt_client.loop_start()
 
         self.networks = []
         self.selected_ssid = tk.StringVar()
+        self._last_status = None # Último texto de status_label (ver _set_status)
 
         self.create_widgets()
+        self.root.after(50, self._drain_ring)
 
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding=20)
@@ -1744,12 +2773,19 @@ class WiFiScannerGUI:
 
         self.status_label = ttk.Label(main_frame, text="Status: Ready")
         self.status_label.pack()
+        self._last_status = "Status: Ready"
+
+    def _set_status(self, text):
+        """Cambia el texto de estado solo si es distinto (los estados repetidos no llegan a Tk)."""
+        if text != self._last_status:
+            self._last_status = text
+            self.status_label.config(text=text)
 
     def start_scan(self):
         """Send command to ESP32 to scan networks"""
-        self.status_label.config(text="Status: Scanning networks...")
+        self._set_status("Status: Scanning networks...")
         # --- CAMBIO: Publicar el comando de escaneo al nuevo tópico ---
-        self.mqtt_client.publish("invernadero/wifi/scan_command", "1") # El ESP32 espera "1"
+        self.mqtt_client.publish("invernadero/wifi/scan_command", "1", qos=0, retain=False) # El ESP32 espera "1"
         # --- FIN CAMBIO ---
 
     def on_select(self, event):
@@ -1774,55 +2810,99 @@ class WiFiScannerGUI:
             "password": password
         }
 
+        # QoS 1 es seguro aquí porque el mensaje es idempotente: si el broker lo entrega dos veces,
+        # el ESP32 solo vuelve a guardar las mismas credenciales
         self.mqtt_client.publish(
             "invernadero/config/wifi",
-            json.dumps(payload)
+            volcar_json(payload),
+            qos=1, retain=False
         )
-        self.status_label.config(text=f"Connecting to {self.selected_ssid.get()}...")
+        self._set_status(f"Connecting to {self.selected_ssid.get()}...")
 
     def on_connect(self, client, userdata, flags, rc):
         """MQTT connection callback"""
-        client.subscribe("invernadero/wifi/scan_results")
-        client.subscribe("invernadero/status/wifi")
-        # --- CAMBIO: Suscribirse al nuevo tópico de comando de escaneo ---
-        client.subscribe("invernadero/wifi/scan_command")
-        # --- FIN CAMBIO ---
+        # invernadero/wifi/scan_command no se suscribe: la GUI solo lo publica y cada escaneo
+        # le volvería como eco
+        if not flags.get("session present"):
+            # Sesión nueva: un solo paquete SUBSCRIBE con todos los temas
+            client.subscribe([
+                ("invernadero/wifi/scan_results", 0),
+                ("invernadero/status/wifi", 0),
+            ])
+        else:
+            # Una sesión persistente creada por una versión anterior aún puede tenerlo suscrito
+            client.unsubscribe("invernadero/wifi/scan_command")
+        # Desactivar Nagle, igual que en AppInvernadero: el comando de escaneo es un paquete de 1 byte
+        sock = client.socket()
+        if sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     def on_message(self, client, userdata, msg):
-        """MQTT message handler"""
-        if msg.topic == "invernadero/wifi/scan_results":
-            # --- CAMBIO: Manejar el JSON de resultados de escaneo ---
-            try:
-                self.networks = json.loads(msg.payload.decode())
-                self.listbox.delete(0, tk.END)
-
-                if isinstance(self.networks, list):
-                    for network_info in self.networks:
-                        if isinstance(network_info, dict) and "ssid" in network_info:
-                            self.listbox.insert(tk.END, network_info["ssid"])
-                        elif isinstance(network_info, str): # Para el caso de "No networks found"
-                            self.listbox.insert(tk.END, network_info)
-                else: # Para el caso de "ERROR: EN MODO AP" o "No networks found" como string
-                    self.listbox.insert(tk.END, msg.payload.decode())
-
-                self.status_label.config(text=f"Found {len(self.networks)} networks" if isinstance(self.networks, list) else msg.payload.decode())
-            except json.JSONDecodeError:
-                self.status_label.config(text=f"Error decoding scan results: {msg.payload.decode()}")
-            # --- FIN CAMBIO ---
-
-        elif msg.topic == "invernadero/status/wifi":
-            self.status_label.config(text=f"WiFi Status: {msg.payload.decode()}")
-        # --- CAMBIO: No es necesario manejar el comando de escaneo aquí, ya se envía ---
-        # elif msg.topic == "invernadero/wifi/scan_command":
-        #     pass # Este es un comando que se envía, no se recibe para procesar aquí.
+        """MQTT message handler (hilo de red de paho: no toca Tk)"""
+        self._mqtt_ring.push((msg.topic, msg.payload))
+
+    def _drain_ring(self):
+        """Aplica en el hilo de Tk los mensajes pendientes; de cada tema solo cuenta el último."""
+        try:
+            ultimos_por_tema = dict(self._mqtt_ring.drain())
+            obtener_manejador = self._handlers.get
+            for topic, payload in ultimos_por_tema.items():
+                manejador = obtener_manejador(topic)
+                if not manejador:
+                    continue
+                # Un mensaje malformado (el broker es público) no debe afectar a los demás
+                try:
+                    manejador(payload)
+                except Exception as e:
+                    log.exception("Scanner MQTT: Error al procesar el mensaje %r en tema %s: %s", payload, topic, e)
+        finally:
+            # Reprogramar siempre: si este pase falla, el siguiente debe seguir consumiendo el anillo
+            self.root.after(50, self._drain_ring)
+
+    def _h_scan_results(self, payload):
+        """Rellena la lista con las redes encontradas por el ESP32."""
+        # --- CAMBIO: Manejar el JSON de resultados de escaneo ---
+        try:
+            # Los bytes van directos al parser; solo se decodifica a str si hace falta mostrarlos
+            self.networks = cargar_json(payload)
+            # Lista de {"ssid": ...}, lista de textos (["No networks found"]) o un texto suelto.
+            # La carga llega de un broker público: cada elemento se comprueba por separado
+            if not isinstance(self.networks, list):
+                # Para el caso de "ERROR: EN MODO AP" o "No networks found" como string
+                texto = payload.decode(errors="replace")
+                filas = [texto]
+                estado = texto
+            else:
+                filas = [network_info["ssid"] if isinstance(network_info, dict) else network_info
+                         for network_info in self.networks
+                         if (isinstance(network_info, dict) and "ssid" in network_info)
+                         or isinstance(network_info, str)] # Se omite cualquier otro elemento
+                estado = f"Found {len(filas)} networks" # Solo las que se muestran
+
+            # Un solo insert con todas las filas en vez de uno por red
+            self.listbox.delete(0, tk.END)
+            if filas:
+                self.listbox.insert(tk.END, *filas)
+
+            self._set_status(estado)
+        except json.JSONDecodeError:
+            self._set_status(f"Error decoding scan results: {payload.decode(errors='replace')}")
         # --- FIN CAMBIO ---
 
+    def _h_status_wifi(self, payload):
+        """Muestra el estado WiFi que publica el ESP32."""
+        self._set_status(f"WiFi Status: {payload.decode(errors='replace')}")
+
     def run(self):
         self.root.mainloop()
 
 
 # --- Ejecución principal ---
 if __name__ == "__main__":
+    # INVERNADERO_LOG=DEBUG muestra el detalle de cada mensaje MQTT; por defecto solo avisos y errores
+    logging.basicConfig(level=os.environ.get("INVERNADERO_LOG", "WARNING").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    precompilar_numba()
     app = AppInvernadero()
     app.mainloop()
 